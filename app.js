@@ -1,23 +1,18 @@
 // AI-Powered Sales Forecasting Dashboard
 class SalesForecastingDashboard {
     constructor() {
+        // Forecast figures come from forecast_api.py; see loadData()
+        this.apiBase = '/api';
+        // Chart pyramid index and the levels fetched so far, keyed by "series.level"
+        this.pyramid = { index: null, levels: {} };
+        // Date range and pyramid level shown in the main chart; null dates mean the full range
+        this.chartView = { series: 'total', start: null, end: null, level: 'overview' };
+        this.zoomTimer = null;
         this.data = {
-            kpi_data: {
-                total_historical_sales: 3225905.41,
-                average_daily_sales: 1235.67,
-                total_90_day_forecast: 125250.45,
-                model_accuracy: "92%"
-            },
-            monthly_forecast: [
-                {"month": "Jan", "forecast": 1330.69, "lower": -1400.38, "upper": 4056.45},
-                {"month": "Feb", "forecast": 1254.99, "lower": -1459.07, "upper": 3975.84},
-                {"month": "Mar", "forecast": 1553.28, "lower": -1154.73, "upper": 4234.54}
-            ],
-            category_data: [
-                {"category": "Furniture", "sales": 1013436.73, "profit": 103773.95},
-                {"category": "Office Supplies", "sales": 1120798.83, "profit": 115069.41},
-                {"category": "Technology", "sales": 1091669.85, "profit": 114191.48}
-            ],
+            kpi_data: null,
+            monthly_forecast: [],
+            category_data: [],
+            region_data: [],
             insights: [
                 "Technology category shows highest profit margins at 10.5%",
                 "Office Supplies maintains most consistent sales volume",
@@ -43,6 +38,201 @@ class SalesForecastingDashboard {
         this.setupEventListeners();
         this.animateElements();
         this.addInteractiveEffects();
+        this.loadData();
+    }
+
+    async fetchJson(path) {
+        // The browser revalidates with the server's ETag, so unchanged data comes back as a 304
+        const response = await fetch(`${this.apiBase}${path}`, { cache: 'no-cache' });
+        if (!response.ok) {
+            throw new Error(`${path}: HTTP ${response.status}`);
+        }
+        return response.json();
+    }
+
+    async loadData() {
+        try {
+            const [kpis, monthly, categories, regions] = await Promise.all([
+                this.fetchJson('/kpis'),
+                this.fetchJson('/monthly'),
+                this.fetchJson('/breakdown?dimension=category'),
+                this.fetchJson('/breakdown?dimension=region')
+            ]);
+            this.data.kpi_data = {
+                total_historical_sales: kpis.total_sales,
+                average_daily_sales: kpis.avg_daily_sales,
+                total_90_day_forecast: kpis.total_90_day_forecast,
+                // Shown as the error itself: 100 - MAPE turns negative once MAPE passes 100%
+                model_mape: kpis.model_mape != null ? `${kpis.model_mape.toFixed(1)}%` : 'n/a',
+                last_historical_date: kpis.last_historical_date
+            };
+            this.data.monthly_forecast = monthly;
+            this.data.category_data = categories;
+            this.data.region_data = regions;
+            this.updateKpiCards();
+            // Refetch the pyramid on every load; unchanged levels come back as 304s
+            this.pyramid = { index: null, levels: {} };
+            // First paint only needs the downsampled overview; finer levels load on zoom
+            const { series, start, end } = this.chartView;
+            this.showChartRange(start, end, series).catch(error => console.warn('Chart data:', error));
+            return true;
+        } catch (error) {
+            console.error('Forecast API error:', error);
+            this.showNotification('Forecast data unavailable - start the dashboard with forecast_api.py', 'error');
+            return false;
+        }
+    }
+
+    async queryForecast(start, end, series = 'total') {
+        // Daily forecast rows between two YYYY-MM-DD dates (either may be omitted)
+        const params = new URLSearchParams({ series });
+        if (start) params.set('start', start);
+        if (end) params.set('end', end);
+        const result = await this.fetchJson(`/forecast?${params}`);
+        return result.rows;
+    }
+
+    async loadChartLevel(series = 'total', level = 'overview') {
+        // One level of the chart pyramid as columns {ds, yhat, yhat_lower, yhat_upper, ...}
+        const key = `${series}.${level}`;
+        if (!this.pyramid.levels[key]) {
+            const params = new URLSearchParams({ series, level });
+            this.pyramid.levels[key] = this.fetchJson(`/pyramid?${params}`);
+        }
+        return this.pyramid.levels[key];
+    }
+
+    async levelForRange(start, end, series = 'total') {
+        // Finest level whose points within [start, end] fit the overview's point budget
+        if (!this.pyramid.index) {
+            this.pyramid.index = await this.fetchJson('/pyramid');
+        }
+        const index = this.pyramid.index;
+        const levels = index.series[series];
+        const dayMs = 24 * 60 * 60 * 1000;
+        const fullStart = new Date(levels.day.start);
+        const fullEnd = new Date(levels.day.end);
+        const from = start ? new Date(start) : fullStart;
+        const to = end ? new Date(end) : fullEnd;
+        const fraction = Math.max(to - from, dayMs) / Math.max(fullEnd - fullStart, dayMs);
+        if (fraction >= 1) {
+            return 'overview';
+        }
+        for (const level of ['day', 'week', 'month', 'quarter']) {
+            if (levels[level].rows * fraction <= index.points) {
+                return level;
+            }
+        }
+        return 'overview';
+    }
+
+    async showChartRange(start = null, end = null, series = 'total') {
+        // Render the main chart from the finest pyramid level that fits the range
+        const level = await this.levelForRange(start, end, series);
+        const data = await this.loadChartLevel(series, level);
+        this.chartView = { series, start, end, level };
+        this.renderForecastChart(data, start, end);
+    }
+
+    renderForecastChart(data, start, end) {
+        const container = document.querySelector('.main-chart .chart-image-container');
+        if (!container) {
+            return;
+        }
+        const width = 800, height = 400;
+        const pad = { left: 64, right: 16, top: 16, bottom: 32 };
+        const from = start || data.ds[0];
+        const to = end || data.ds[data.ds.length - 1];
+        const rows = data.ds.map((ds, i) => i).filter(i => data.ds[i] >= from && data.ds[i] <= to);
+        if (rows.length < 2) {
+            return;
+        }
+        const actual = data.actual || [];
+        // In-sample fitted values stay hidden; the forecast line starts where the history ends
+        const historyEnd = this.pyramid.index.history_end || '';
+        const future = rows.filter(i => data.ds[i] >= historyEnd);
+        const values = rows.map(i => actual[i]).concat(future.flatMap(i => [data.yhat_lower[i], data.yhat_upper[i]]))
+            .filter(value => value != null);
+        const t0 = Date.parse(from), t1 = Math.max(Date.parse(to), t0 + 1);
+        // Sales are never negative, so the axis starts at zero even where the band dips below it
+        const yMin = Math.max(Math.min(...values), 0), yMax = Math.max(...values, yMin + 1);
+        const x = ds => pad.left + (Date.parse(ds) - t0) / (t1 - t0) * (width - pad.left - pad.right);
+        const y = value => height - pad.bottom - (Math.max(value, yMin) - yMin) / (yMax - yMin) * (height - pad.top - pad.bottom);
+        const line = (column, keep) => rows.reduce((path, i) => {
+            if (column[i] == null || !keep(i)) return { d: path.d, open: false };
+            return { d: `${path.d}${path.open ? 'L' : 'M'}${x(data.ds[i]).toFixed(1)},${y(column[i]).toFixed(1)}`, open: true };
+        }, { d: '', open: false }).d;
+
+        const band = future.map(i => `${x(data.ds[i]).toFixed(1)},${y(data.yhat_upper[i]).toFixed(1)}`)
+            .concat(future.slice().reverse().map(i => `${x(data.ds[i]).toFixed(1)},${y(data.yhat_lower[i]).toFixed(1)}`));
+        const ticks = [0, 0.25, 0.5, 0.75, 1];
+        const labels = ticks.map(f => {
+            const value = yMin + f * (yMax - yMin);
+            const date = new Date(t0 + f * (t1 - t0)).toISOString().slice(0, 10);
+            return `<text x="${pad.left - 6}" y="${y(value).toFixed(1)}" text-anchor="end" dominant-baseline="middle">${this.formatCurrency(value)}</text>` +
+                `<text x="${x(date).toFixed(1)}" y="${height - 8}" text-anchor="middle">${date}</text>`;
+        }).join('');
+
+        container.innerHTML = `
+            <svg class="forecast-chart" viewBox="0 0 ${width} ${height}" width="100%" role="img"
+                 aria-label="Daily sales forecast, ${this.chartView.level} level">
+                <title>Scroll to zoom, double-click to reset (${this.chartView.level} level)</title>
+                <g font-size="11" fill="var(--color-text-secondary)">${labels}</g>
+                <polygon points="${band.join(' ')}" fill="rgba(255, 193, 133, 0.3)"/>
+                <path d="${line(actual, () => true)}" fill="none" stroke="#1FB8CD" stroke-width="1.5"/>
+                <path d="${line(data.yhat, i => data.ds[i] >= historyEnd)}" fill="none" stroke="#FFC185" stroke-width="2"/>
+            </svg>`;
+        if (!container.dataset.zoom) {
+            container.dataset.zoom = 'on';
+            container.addEventListener('wheel', event => this.zoomChart(event, container), { passive: false });
+            container.addEventListener('dblclick', () => this.showChartRange(null, null, this.chartView.series));
+        }
+    }
+
+    zoomChart(event, container) {
+        // Halve or double the visible range around the cursor, then fetch the matching level
+        event.preventDefault();
+        const { series, start, end } = this.chartView;
+        const levels = this.pyramid.index.series[series];
+        const dayMs = 24 * 60 * 60 * 1000;
+        const fullStart = Date.parse(levels.day.start), fullEnd = Date.parse(levels.day.end);
+        const t0 = start ? Date.parse(start) : fullStart;
+        const t1 = end ? Date.parse(end) : fullEnd;
+        const rect = container.getBoundingClientRect();
+        const fraction = Math.min(Math.max((event.clientX - rect.left) / rect.width, 0), 1);
+        const cursor = t0 + fraction * (t1 - t0);
+        const span = Math.max((t1 - t0) * (event.deltaY < 0 ? 0.5 : 2), 14 * dayMs);
+        let from = cursor - fraction * span;
+        let to = from + span;
+        if (to - from >= fullEnd - fullStart) {
+            from = null;
+            to = null;
+        } else {
+            from = Math.max(from, fullStart);
+            to = Math.min(from + span, fullEnd);
+            from = to - span;
+        }
+        const day = t => (t == null ? null : new Date(t).toISOString().slice(0, 10));
+        clearTimeout(this.zoomTimer);
+        this.zoomTimer = setTimeout(() => {
+            this.showChartRange(day(from), day(to), series).catch(error => console.warn('Chart data:', error));
+        }, 150);
+    }
+
+    updateKpiCards() {
+        const kpis = this.data.kpi_data;
+        const values = {
+            'total-sales': this.formatCurrency(kpis.total_historical_sales),
+            'avg-daily': `$${Math.round(kpis.average_daily_sales).toLocaleString('en-US')}`,
+            'forecast': this.formatCurrency(kpis.total_90_day_forecast),
+            'accuracy': kpis.model_mape
+        };
+        Object.entries(values).forEach(([kpi, value]) => {
+            const element = document.querySelector(`.kpi-card[data-kpi="${kpi}"] .kpi-value`);
+            if (element) {
+                element.textContent = value;
+            }
+        });
     }
 
     displayCurrentDate() {
@@ -123,25 +313,35 @@ class SalesForecastingDashboard {
         });
     }
 
-    downloadForecastChart() {
-        // Simulate download
-        this.showNotification('Forecast chart download started...', 'success');
-        
-        // Create a temporary link to simulate download
+    async downloadForecastChart() {
+        // Daily forecast rows of the range shown in the chart, as CSV
+        const { series, start, end } = this.chartView;
+        let rows;
+        try {
+            rows = await this.queryForecast(start, end, series);
+        } catch (error) {
+            console.error('Forecast API error:', error);
+            this.showNotification('Forecast data unavailable - start the dashboard with forecast_api.py', 'error');
+            return;
+        }
+        const csv = ['ds,yhat,yhat_lower,yhat_upper']
+            .concat(rows.map(row => [row.ds, row.yhat, row.yhat_lower, row.yhat_upper].join(',')))
+            .join('\n');
+        const url = URL.createObjectURL(new Blob([csv], { type: 'text/csv' }));
         const link = document.createElement('a');
-        link.href = 'https://ppl-ai-code-interpreter-files.s3.amazonaws.com/web/direct-files/08914a9a4f080294ddcfb29ce1942b09/ada3727c-b6cb-48e9-a709-15487e6f8fd9/789de56a.png';
-        link.download = 'daily-sales-forecast.png';
-        link.target = '_blank';
+        link.href = url;
+        link.download = `daily-sales-forecast-${start || 'start'}-to-${end || 'end'}.csv`;
         document.body.appendChild(link);
         link.click();
         document.body.removeChild(link);
+        URL.revokeObjectURL(url);
+        this.showNotification(`Downloaded ${rows.length} forecast rows`, 'success');
     }
 
-    refreshDashboard() {
+    async refreshDashboard() {
         this.showNotification('Refreshing dashboard data...', 'info');
         
-        // Simulate data refresh with loading state
-        const loadingElement = this.createLoadingElement();
+        // Reload from the forecast API with a loading state
         const mainContent = document.querySelector('.charts-section');
         
         if (mainContent) {
@@ -149,20 +349,25 @@ class SalesForecastingDashboard {
             mainContent.style.pointerEvents = 'none';
         }
 
-        setTimeout(() => {
-            this.displayCurrentDate();
-            this.animateElements();
-            
-            if (mainContent) {
-                mainContent.style.opacity = '1';
-                mainContent.style.pointerEvents = 'auto';
-            }
-            
+        const loaded = await this.loadData();
+        this.displayCurrentDate();
+        this.animateElements();
+        
+        if (mainContent) {
+            mainContent.style.opacity = '1';
+            mainContent.style.pointerEvents = 'auto';
+        }
+        
+        if (loaded) {
             this.showNotification('Dashboard refreshed successfully!', 'success');
-        }, 2000);
+        }
     }
 
     exportReport() {
+        if (!this.data.kpi_data) {
+            this.showNotification('Forecast data has not been loaded yet', 'error');
+            return;
+        }
         this.showNotification('Generating comprehensive sales report...', 'info');
         
         // Simulate report generation
@@ -194,7 +399,7 @@ KEY PERFORMANCE INDICATORS:
 - Total Historical Sales: $${(data.kpis.total_historical_sales / 1000000).toFixed(2)}M
 - Average Daily Sales: $${data.kpis.average_daily_sales.toFixed(0)}
 - 90-Day Forecast: $${(data.kpis.total_90_day_forecast / 1000).toFixed(0)}K
-- Model Accuracy: ${data.kpis.model_accuracy}
+- Forecast Error (MAPE): ${data.kpis.model_mape}
 
 KEY INSIGHTS:
 ${data.insights.map(insight => `- ${insight}`).join('\n')}
@@ -245,7 +450,7 @@ ${data.forecast.map(month =>
                 insight: '12% growth potential identified for the forecast period.'
             },
             'accuracy': {
-                title: 'Model Accuracy',
+                title: 'Forecast Error (MAPE)',
                 description: 'Mean Absolute Percentage Error (MAPE) of our forecasting model.',
                 trend: '92% confidence level',
                 insight: 'High accuracy indicates reliable predictions for business planning.'
@@ -0,0 +1,57 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import time
+
+IO_THREADS = 2
+
+class BackgroundTasks:
+    """Output work (CSV writes, analysis tables, charts) run on threads while the main thread fits
+
+    Prophet spends its fit inside the Stan process, so the main thread mostly waits and the
+    writer threads get the interpreter to themselves. When disabled every task runs inline at
+    submit time, so both modes share one code path and produce the same files.
+    """
+
+    def __init__(self, enabled=True, profiler=None, max_workers=IO_THREADS):
+        self.pool = ThreadPoolExecutor(max_workers, thread_name_prefix='output') if enabled else None
+        self.profiler = profiler
+        self.futures = []
+
+    def _run(self, name, fn, args, rows_in, after):
+        # Dependencies were submitted earlier, so FIFO scheduling has already started them
+        for future in after:
+            future.result()
+        if self.profiler is None:
+            return fn(*args)
+        with self.profiler.stage(name, rows_in=rows_in):
+            return fn(*args)
+
+    def submit(self, name, fn, *args, rows_in=None, after=()):
+        """Schedule fn(*args) as profiler stage `name` once the `after` futures are done; returns a Future"""
+        if self.pool is not None:
+            future = self.pool.submit(self._run, name, fn, args, rows_in, after)
+        else:
+            future = Future()
+            future.set_result(self._run(name, fn, args, rows_in, after))
+        self.futures.append((name, future))
+        return future
+
+    def wait(self):
+        """Block until every task has finished, re-raising the first failure; returns seconds waited"""
+        start = time.perf_counter()
+        try:
+            for name, future in self.futures:
+                future.result()
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+        waited = time.perf_counter() - start
+        if self.pool is not None:
+            print(f"Background output: {len(self.futures)} task(s), {waited:.2f}s spent waiting after the fits")
+        return waited
+
+def add_concurrency_arguments(parser):
+    """Add the concurrency options: background output writing and its thread count"""
+    parser.add_argument('--concurrent', action='store_true',
+                        help="Write outputs on background threads while models are still fitting")
+    parser.add_argument('--io-threads', type=int, default=IO_THREADS,
+                        help="Background threads used by --concurrent")
@@ -0,0 +1,133 @@
+import pandas as pd
+import numpy as np
+from concurrent.futures import as_completed
+from prophet.serialize import model_to_json, model_from_json
+from model_cache import ModelCache, fingerprint
+from parallel_forecast import build_model, process_pool
+import warnings
+import os
+import time
+
+warnings.filterwarnings('ignore')
+
+BACKTEST_CACHE_DIR = 'models/backtest'
+DEFAULT_BUCKETS = (7, 30, 90)
+
+def make_cutoffs(ds, n_cutoffs=4, horizon=90, stride=30, min_train_days=365):
+    """Rolling-origin cutoffs, the latest one horizon days before the end of the history"""
+    last = ds.max()
+    first_allowed = ds.min() + pd.Timedelta(days=min_train_days)
+    cutoffs = [last - pd.Timedelta(days=horizon + i * stride) for i in range(n_cutoffs)]
+    return sorted(cutoff for cutoff in cutoffs if cutoff >= first_allowed)
+
+def horizon_buckets(horizon, buckets=DEFAULT_BUCKETS):
+    """Bucket edges up to the backtest horizon, the last edge being the horizon itself"""
+    return tuple(edge for edge in buckets if edge < horizon) + (horizon,)
+
+def _cache_params(task):
+    return dict(task['params'], country_holidays=task.get('country_holidays'))
+
+def _predict_horizon(model, cutoff, horizon):
+    future = pd.DataFrame({'ds': pd.date_range(cutoff + pd.Timedelta(days=1), periods=horizon, freq='D')})
+    model.uncertainty_samples = 0  # point forecasts are all the metrics need
+    return model.predict(future)[['ds', 'yhat']]
+
+def fit_cutoff(task, cutoff, horizon):
+    """Fit one series on its history up to cutoff and forecast the next horizon days"""
+    train = task['series'][task['series']['ds'] <= cutoff]
+    model = build_model(task)
+    model.fit(train[['ds', 'y']])
+    return task['name'], cutoff, model_to_json(model), _predict_horizon(model, cutoff, horizon)
+
+def run_backtest(tasks, n_cutoffs=4, horizon=90, stride=30, max_workers=None,
+                 cache_dir=BACKTEST_CACHE_DIR):
+    """Fit every (series, cutoff) pair in parallel, reusing cached fits for unchanged windows"""
+    cache = ModelCache(cache_dir)
+    start = time.perf_counter()
+    predictions = []
+    pending = []
+
+    for task in tasks:
+        for cutoff in make_cutoffs(task['series']['ds'], n_cutoffs, horizon, stride):
+            train = task['series'][task['series']['ds'] <= cutoff]
+            key = fingerprint(train, _cache_params(task))
+            model = cache.get(key)
+            if model is not None:
+                predictions.append((task['name'], cutoff, _predict_horizon(model, cutoff, horizon)))
+            else:
+                pending.append((task, cutoff, key))
+
+    keys = {(task['name'], cutoff): key for task, cutoff, key in pending}
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(pending) <= 1:
+        results = [fit_cutoff(task, cutoff, horizon) for task, cutoff, _ in pending]
+    else:
+        with process_pool(min(max_workers, len(pending))) as pool:
+            futures = [pool.submit(fit_cutoff, task, cutoff, horizon) for task, cutoff, _ in pending]
+            results = [future.result() for future in as_completed(futures)]
+
+    for name, cutoff, model_json, forecast in results:
+        cache.put(keys[(name, cutoff)], model_from_json(model_json))
+        predictions.append((name, cutoff, forecast))
+
+    if not predictions:
+        print(f"No backtest: no series has {horizon} days beyond a year of training history")
+        return pd.DataFrame(columns=['ds', 'yhat', 'series', 'cutoff', 'h', 'y'])
+
+    stats = cache.stats()
+    print(f"Backtest: {len(predictions)} cutoff fits ({stats['hits']} reused, {len(results)} fitted) "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    actuals = {task['name']: task['series'].set_index('ds')['y'] for task in tasks}
+    labels = {task['name']: task['label'] for task in tasks}
+    frames = []
+    for name, cutoff, forecast in predictions:
+        frame = forecast.copy()
+        frame['series'] = labels[name]
+        frame['cutoff'] = cutoff
+        frame['h'] = (frame['ds'] - cutoff).dt.days
+        frame['y'] = actuals[name].reindex(frame['ds']).values
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+def horizon_metrics(points, buckets=DEFAULT_BUCKETS):
+    """MAE, RMSE, MAPE and bias per series and horizon bucket, computed with array ops"""
+    points = points.dropna(subset=['y'])
+    series_codes, series_names = pd.factorize(points['series'])
+    edges = np.asarray(buckets)
+    bucket = np.searchsorted(edges, points['h'].to_numpy(), side='left')
+    in_range = bucket < len(edges)
+
+    n_buckets = len(edges)
+    cell = (series_codes * n_buckets + bucket)[in_range]
+    y = points['y'].to_numpy()[in_range]
+    err = (points['yhat'].to_numpy() - points['y'].to_numpy())[in_range]
+    nonzero = y != 0
+    size = len(series_names) * n_buckets
+
+    count = np.bincount(cell, minlength=size)
+    abs_sum = np.bincount(cell, weights=np.abs(err), minlength=size)
+    sq_sum = np.bincount(cell, weights=err ** 2, minlength=size)
+    bias_sum = np.bincount(cell, weights=err, minlength=size)
+    pct_count = np.bincount(cell[nonzero], minlength=size)
+    pct_sum = np.bincount(cell[nonzero], weights=np.abs(err[nonzero] / y[nonzero]), minlength=size)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        metrics = pd.DataFrame({
+            'series': np.repeat(np.asarray(series_names), n_buckets),
+            'horizon_days': np.tile([f'{lo + 1}-{hi}' for lo, hi in zip((0,) + tuple(edges[:-1]), edges)],
+                                    len(series_names)),
+            'n': count,
+            'mae': abs_sum / count,
+            'rmse': np.sqrt(sq_sum / count),
+            'mape': pct_sum / pct_count * 100,
+            'bias': bias_sum / count
+        })
+    return metrics[metrics['n'] > 0].round(2).reset_index(drop=True)
+
+def overall_metrics(points, series):
+    """MAE and MAPE over every backtest point of one series"""
+    points = points[(points['series'] == series)].dropna(subset=['y'])
+    err = np.abs(points['yhat'].to_numpy() - points['y'].to_numpy())
+    y = points['y'].to_numpy()
+    return err.mean(), (err[y != 0] / y[y != 0]).mean() * 100
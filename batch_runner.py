@@ -0,0 +1,196 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import subprocess
+import argparse
+import hashlib
+import signal
+import shutil
+import json
+import time
+import sys
+import os
+
+OUTPUT_ROOT = 'batch'
+STATUS_FILE = 'status.json'
+LOG_FILE = 'run.log'
+BATCH_STATUS_FILE = 'batch_status.json'
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sales_forecasting_script.py')
+THREAD_ENV = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'NUMEXPR_NUM_THREADS']
+# Applies the limits in the child and then replaces itself with the job. Unlike preexec_fn,
+# nothing runs between fork and exec, which is not safe while other threads are launching jobs.
+LIMIT_LAUNCHER = (
+    "import os, resource, sys\n"
+    "cpu_seconds, memory_bytes = int(sys.argv[1]), int(sys.argv[2])\n"
+    "if cpu_seconds:\n"
+    "    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 5))\n"
+    "if memory_bytes:\n"
+    "    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))\n"
+    "os.execv(sys.argv[3], sys.argv[3:])\n"
+)
+
+def load_manifest(path):
+    """Jobs from a JSON manifest: [{"name": ..., "data": ..., "args": [...]}, ...]
+
+    Relative dataset paths are resolved against the manifest's folder.
+    """
+    with open(path) as f:
+        manifest = json.load(f)
+    jobs = manifest['jobs'] if isinstance(manifest, dict) else manifest
+    base = os.path.dirname(os.path.abspath(path))
+    names = set()
+    for job in jobs:
+        # The name becomes a folder under the output root and must stay inside it
+        name = job['name']
+        if not name or '..' in name or any(sep and sep in name for sep in ('/', os.sep, os.altsep)):
+            raise ValueError(f"Invalid job name in manifest (no path separators or '..'): {name!r}")
+        if name in names:
+            raise ValueError(f"Duplicate job name in manifest: {name}")
+        names.add(name)
+        job['data'] = os.path.join(base, job['data'])
+        job.setdefault('args', [])
+    return jobs
+
+def job_signature(job):
+    """Identity of a job's inputs: dataset size and mtime plus its script arguments"""
+    stat = os.stat(job['data'])
+    spec = json.dumps([job['data'], stat.st_size, stat.st_mtime_ns, job['args']])
+    return hashlib.sha256(spec.encode()).hexdigest()
+
+def read_status(root):
+    path = os.path.join(root, STATUS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def write_status(root, status):
+    """Persist a job's status atomically so an interrupted batch never leaves a torn file"""
+    path = os.path.join(root, STATUS_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(status, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def prepare_root(root, data_path):
+    """Job folder laid out like the project root: data/superstore_sales.csv points at the dataset"""
+    os.makedirs(os.path.join(root, 'data'), exist_ok=True)
+    link = os.path.join(root, 'data', 'superstore_sales.csv')
+    if os.path.lexists(link):
+        os.remove(link)
+    try:
+        os.symlink(os.path.abspath(data_path), link)
+    except OSError:
+        shutil.copyfile(data_path, link)
+
+def limited_command(command, cpu_seconds=None, memory_mb=None):
+    """command wrapped in a launcher that applies per-job CPU-time and address-space limits
+
+    SIGXCPU at the CPU soft limit names the cause; the hard limit 5s later is the backstop.
+    """
+    if not cpu_seconds and not memory_mb:
+        return command
+    memory_bytes = int(memory_mb * 1024 * 1024) if memory_mb else 0
+    return [sys.executable, '-c', LIMIT_LAUNCHER, str(cpu_seconds or 0), str(memory_bytes)] + command
+
+def run_job(job, output_root, limits):
+    """Run the forecasting pipeline for one dataset in its own output root and record the outcome"""
+    root = os.path.join(output_root, job['name'])
+    os.makedirs(root, exist_ok=True)
+    status = {'name': job['name'], 'data': job['data'], 'args': job['args'], 'started': time.time(),
+              'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'max_rss_mb': 0.0}
+    if not os.path.exists(job['data']):
+        status.update(state='failed', error=f"dataset not found: {job['data']}")
+        write_status(root, status)
+        return status
+    prepare_root(root, job['data'])
+    status.update(signature=job_signature(job), state='running')
+    write_status(root, status)
+
+    env = dict(os.environ)
+    # Keep each job to its share of cores instead of every BLAS pool grabbing all of them
+    env.update({name: str(limits['threads']) for name in THREAD_ENV})
+    start = time.perf_counter()
+    with open(os.path.join(root, LOG_FILE), 'w') as log:
+        command = limited_command([sys.executable, SCRIPT] + job['args'],
+                                  limits['cpu_seconds'], limits['memory_mb'])
+        proc = subprocess.Popen(command, cwd=root, env=env, stdout=log, stderr=subprocess.STDOUT)
+        # wait4 returns this child's own resource usage, unaffected by the other running jobs
+        _, wait_status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(wait_status)
+
+    status.update({
+        'state': 'done' if proc.returncode == 0 else 'failed',
+        'returncode': proc.returncode,
+        'finished': time.time(),
+        'wall_seconds': round(time.perf_counter() - start, 2),
+        'cpu_seconds': round(usage.ru_utime + usage.ru_stime, 2),
+        'max_rss_mb': round(usage.ru_maxrss / 1024, 1)
+    })
+    if proc.returncode < 0:
+        status['error'] = f"killed by {signal.Signals(-proc.returncode).name}"
+    elif proc.returncode:
+        status['error'] = f"exit code {proc.returncode}, see {os.path.join(root, LOG_FILE)}"
+    write_status(root, status)
+    return status
+
+def pending_jobs(jobs, output_root, force=False):
+    """Jobs that still have to run; finished jobs with unchanged inputs are skipped on resume"""
+    pending, finished = [], []
+    for job in jobs:
+        status = read_status(os.path.join(output_root, job['name']))
+        if (not force and status and status['state'] == 'done' and os.path.exists(job['data'])
+                and status['signature'] == job_signature(job)):
+            finished.append(status)
+        else:
+            pending.append(job)
+    return pending, finished
+
+def run_batch(jobs, output_root=OUTPUT_ROOT, workers=2, limits=None, force=False):
+    """Run every pending job on a pool of at most `workers` concurrent pipelines"""
+    limits = dict({'threads': 1, 'cpu_seconds': None, 'memory_mb': None}, **(limits or {}))
+    os.makedirs(output_root, exist_ok=True)
+    pending, finished = pending_jobs(jobs, output_root, force)
+    for status in finished:
+        print(f"  skip   {status['name']:<20} done in a previous run")
+
+    results = {status['name']: status for status in finished}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run_job, job, output_root, limits): job for job in pending}
+        for future in as_completed(futures):
+            status = future.result()
+            results[status['name']] = status
+            line = (f"  {status['state']:<6} {status['name']:<20} {status['wall_seconds']:>8.1f}s wall "
+                    f"{status['cpu_seconds']:>8.1f}s cpu {status['max_rss_mb']:>8.1f} MB peak RSS")
+            print(line + (f"  ({status['error']})" if 'error' in status else ''))
+
+    summary = [results[job['name']] for job in jobs]
+    with open(os.path.join(output_root, BATCH_STATUS_FILE), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Run the forecasting pipeline for many datasets")
+    parser.add_argument('manifest', help="JSON list of jobs: name, data (CSV path) and optional args")
+    parser.add_argument('--output-root', default=OUTPUT_ROOT, help="Folder holding one output root per job")
+    parser.add_argument('--workers', type=int, default=2, help="Jobs running at the same time")
+    parser.add_argument('--threads', type=int, default=1, help="Numeric library threads per job")
+    parser.add_argument('--cpu-seconds', type=int, help="CPU time limit per job")
+    parser.add_argument('--memory-mb', type=float, help="Address-space limit per job")
+    parser.add_argument('--force', action='store_true', help="Rerun jobs that already finished")
+    return parser.parse_args()
+
+def main():
+    """Main execution function"""
+    args = parse_args()
+    jobs = load_manifest(args.manifest)
+    limits = {'threads': args.threads, 'cpu_seconds': args.cpu_seconds, 'memory_mb': args.memory_mb}
+    print(f"Batch of {len(jobs)} job(s), {args.workers} at a time, outputs in '{args.output_root}/':")
+    start = time.perf_counter()
+    summary = run_batch(jobs, args.output_root, args.workers, limits, args.force)
+    failed = [status['name'] for status in summary if status['state'] != 'done']
+    print(f"\n{len(summary) - len(failed)} of {len(summary)} job(s) done in {time.perf_counter() - start:.1f}s; "
+          f"status in '{os.path.join(args.output_root, BATCH_STATUS_FILE)}'")
+    if failed:
+        sys.exit(f"Failed job(s): {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
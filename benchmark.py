@@ -0,0 +1,184 @@
+import pandas as pd
+import argparse
+import platform
+import tracemalloc
+import tempfile
+import warnings
+import json
+import time
+import sys
+import os
+from datetime import datetime
+from prophet import Prophet
+from data_loader import load_sales
+from fast_predict import predict_forecast
+from instrumentation import max_rss_mb
+from sales_cube import CUBE_COLUMNS, build_cube, daily_from_cube
+from synthetic_data import write_superstore
+import sales_forecasting_script as pipeline
+
+warnings.filterwarnings('ignore')
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+DATA_DIR = 'benchmarks/data'
+RESULTS_FILE = 'benchmarks/results.json'
+STAGES = ['load', 'aggregate', 'fit', 'predict', 'save', 'analysis']
+
+# Stages faster than this are too noisy to flag as regressions
+MIN_SECONDS = 0.05
+
+def dataset_path(n_rows, n_categories, n_regions, data_dir=DATA_DIR):
+    """Location of the generated dataset for one benchmark size"""
+    return os.path.join(data_dir, f'superstore_{n_rows}_{n_categories}c_{n_regions}r.csv')
+
+def ensure_dataset(n_rows, n_categories, n_regions, data_dir=DATA_DIR, seed=42):
+    """Generate the dataset for one size unless it already exists"""
+    path = dataset_path(n_rows, n_categories, n_regions, data_dir)
+    if not os.path.exists(path):
+        print(f"Generating {n_rows:,} rows ({n_categories} categories, {n_regions} regions)...")
+        start = time.perf_counter()
+        write_superstore(path, n_rows, n_categories, n_regions, seed=seed)
+        print(f"  written to {path} in {time.perf_counter() - start:.1f}s")
+    return path
+
+def measure(stage, fn, *args, track_memory=True):
+    """Run one stage, returning its result and wall time, CPU time and peak allocation"""
+    if track_memory:
+        tracemalloc.reset_peak()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    result = fn(*args)
+    record = {
+        'stage': stage,
+        'seconds': round(time.perf_counter() - wall_start, 4),
+        'cpu_seconds': round(time.process_time() - cpu_start, 4),
+        'peak_mb': round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2) if track_memory else None,
+        'max_rss_mb': round(max_rss_mb(), 1)
+    }
+    return result, record
+
+def run_pipeline(path, track_memory=True):
+    """Time each stage of sales_forecasting_script.main() on one dataset"""
+    def aggregate(df):
+        cube = build_cube(df)
+        daily = daily_from_cube(cube)
+        forecast_data = daily.rename(columns={'Order Date': 'ds', 'Sales': 'y'})
+        return cube, forecast_data.sort_values('ds').reset_index(drop=True)
+
+    def fit(forecast_data):
+        model = Prophet(**pipeline.PROPHET_PARAMS)
+        return model.fit(forecast_data[['ds', 'y']])
+
+    records = []
+    if track_memory:
+        tracemalloc.start()
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            # Outputs go to a scratch forecast/ folder, never over the real results
+            os.chdir(workdir)
+            os.makedirs('forecast')
+            df, record = measure('load', load_sales, path, CUBE_COLUMNS, False, track_memory=track_memory)
+            records.append(dict(record, rows_in=len(df), rows_out=len(df)))
+            (cube, forecast_data), record = measure('aggregate', aggregate, df, track_memory=track_memory)
+            records.append(dict(record, rows_in=len(df), rows_out=len(cube)))
+            del df
+            model, record = measure('fit', fit, forecast_data, track_memory=track_memory)
+            records.append(dict(record, rows_in=len(forecast_data), rows_out=len(forecast_data)))
+            forecast, record = measure('predict', predict_forecast, model, 90, track_memory=track_memory)
+            records.append(dict(record, rows_in=len(forecast_data), rows_out=len(forecast)))
+            _, record = measure('save', pipeline.save_forecast_data, forecast, forecast_data,
+                                track_memory=track_memory)
+            records.append(dict(record, rows_in=len(forecast), rows_out=len(forecast)))
+            _, record = measure('analysis', pipeline.create_analysis_files, cube, track_memory=track_memory)
+            records.append(dict(record, rows_in=len(cube), rows_out=None))
+    finally:
+        os.chdir(cwd)
+        if track_memory:
+            tracemalloc.stop()
+    return records
+
+def find_regressions(results, baseline, threshold=0.2):
+    """Stages whose time or peak memory grew by more than threshold over the baseline"""
+    def key(record):
+        return (record['rows'], record['categories'], record['regions'], record['stage'])
+
+    previous = {key(record): record for record in baseline['results']}
+    regressions = []
+    for record in results['results']:
+        old = previous.get(key(record))
+        if old is None:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            new_value, old_value = record.get(metric), old.get(metric)
+            if new_value is None or old_value is None:
+                continue
+            if metric == 'seconds' and max(new_value, old_value) < MIN_SECONDS:
+                continue
+            if old_value > 0 and new_value > old_value * (1 + threshold):
+                regressions.append({
+                    'rows': record['rows'], 'stage': record['stage'], 'metric': metric,
+                    'baseline': old_value, 'current': new_value,
+                    'change_pct': round((new_value / old_value - 1) * 100, 1)
+                })
+    return regressions
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Benchmark the forecasting pipeline on synthetic data")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Dataset sizes in rows")
+    parser.add_argument('--categories', type=int, default=3, help="Number of product categories")
+    parser.add_argument('--regions', type=int, default=4, help="Number of regions")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed of the generator")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Where generated datasets are kept")
+    parser.add_argument('--output', default=RESULTS_FILE, help="Results JSON file")
+    parser.add_argument('--baseline', default=None,
+                        help="Results JSON of an earlier run to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Allowed relative slowdown or memory growth before failing (0.2 = 20%%)")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="Skip tracemalloc peak tracking, which slows Python-heavy stages")
+    return parser.parse_args()
+
+def main():
+    """Main execution function"""
+    args = parse_args()
+    print("=== Sales Forecasting Pipeline Benchmark ===")
+
+    records = []
+    for n_rows in args.sizes:
+        path = ensure_dataset(n_rows, args.categories, args.regions, args.data_dir, args.seed)
+        print(f"\nBenchmarking {n_rows:,} rows...")
+        for record in run_pipeline(os.path.abspath(path), track_memory=not args.no_memory):
+            record = dict(rows=n_rows, categories=args.categories, regions=args.regions, **record)
+            records.append(record)
+            peak = f"{record['peak_mb']:>9.1f} MB" if record['peak_mb'] is not None else ''
+            print(f"  {record['stage']:<10} {record['seconds']:>9.3f}s {peak}")
+
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': records
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for item in regressions:
+                print(f"  {item['rows']:,} rows / {item['stage']} {item['metric']}: "
+                      f"{item['baseline']} -> {item['current']} (+{item['change_pct']}%)")
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
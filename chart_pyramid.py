@@ -0,0 +1,151 @@
+import pandas as pd
+import numpy as np
+import argparse
+import glob
+import gzip
+import json
+import os
+
+PYRAMID_DIR = 'pyramid'
+INDEX_FILE = 'index.json'
+DEFAULT_POINTS = 300
+VALUE_COLUMNS = ['yhat', 'yhat_lower', 'yhat_upper', 'actual']
+
+# Coarse to fine; 'overview' is the day level reduced to a fixed point budget
+LEVELS = {'quarter': 'Q', 'month': 'M', 'week': 'W', 'day': None}
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the shape of y over x"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # First and last points are always kept; the rest are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Keep the point forming the largest triangle with the last kept point and the next bucket's mean
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def downsample(frame, n_out):
+    """Rows of a daily series chosen by LTTB on yhat; the interval columns of each kept row come along"""
+    x = (frame['ds'] - frame['ds'].iloc[0]).dt.days.to_numpy(dtype=float)
+    return frame.iloc[lttb_indices(x, frame['yhat'].to_numpy(), n_out)]
+
+def aggregate_level(frame, freq):
+    """Mean daily values per week, month or quarter, labelled by period start
+
+    Means rather than sums keep every level on the same scale, so zooming does not rescale the axis.
+    """
+    periods = frame['ds'].dt.to_period(freq).dt.start_time.rename('ds')
+    columns = [column for column in VALUE_COLUMNS if column in frame]
+    grouped = frame.groupby(periods)
+    level = grouped[columns].mean()
+    level['days'] = grouped.size()
+    return level.reset_index()
+
+def level_payload(frame):
+    """Columnar JSON payload of one level: dates as strings, values rounded to cents, gaps as null"""
+    payload = {'ds': frame['ds'].dt.strftime('%Y-%m-%d').tolist()}
+    for column in frame.columns.drop('ds'):
+        values = frame[column].round(2).astype(object)
+        payload[column] = values.where(frame[column].notna(), None).tolist()
+    return payload
+
+def write_gzip_json(payload, path):
+    """Precompressed JSON; mtime=0 keeps the bytes identical for identical data"""
+    data = json.dumps(payload, separators=(',', ':')).encode()
+    with open(path, 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    return len(data)
+
+def series_levels(frame, points=DEFAULT_POINTS):
+    """All levels of one daily series, coarsest first"""
+    frame = frame.sort_values('ds').reset_index(drop=True)
+    levels = {'overview': downsample(frame, points)}
+    for name, freq in LEVELS.items():
+        levels[name] = aggregate_level(frame, freq) if freq else frame
+    return levels
+
+def write_pyramid(series, output_dir, points=DEFAULT_POINTS, history_end=None):
+    """Write every level of every series as <series>.<level>.json.gz plus an index.json describing them
+
+    series maps a name to a daily frame with ds, yhat, yhat_lower, yhat_upper and optionally actual.
+    """
+    pyramid_dir = os.path.join(output_dir, PYRAMID_DIR)
+    os.makedirs(pyramid_dir, exist_ok=True)
+    index = {'points': points, 'levels': ['overview'] + list(LEVELS), 'series': {}}
+    if history_end is not None:
+        index['history_end'] = pd.Timestamp(history_end).strftime('%Y-%m-%d')
+
+    for name, frame in series.items():
+        columns = ['ds'] + [column for column in VALUE_COLUMNS if column in frame]
+        entry = {}
+        for level, data in series_levels(frame[columns], points).items():
+            filename = f"{name}.{level}.json.gz"
+            raw_bytes = write_gzip_json(level_payload(data), os.path.join(pyramid_dir, filename))
+            entry[level] = {
+                'file': filename,
+                'rows': len(data),
+                'start': data['ds'].min().strftime('%Y-%m-%d'),
+                'end': data['ds'].max().strftime('%Y-%m-%d'),
+                'bytes': raw_bytes,
+                'gzip_bytes': os.path.getsize(os.path.join(pyramid_dir, filename))
+            }
+        index['series'][name] = entry
+
+    with open(os.path.join(pyramid_dir, INDEX_FILE), 'w') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+def load_series(output_dir, actuals=None):
+    """Daily forecast series in an output folder: 'total' plus any per-category forecast_*.csv"""
+    files = {'total': os.path.join(output_dir, 'daily_forecast.csv')}
+    for path in sorted(glob.glob(os.path.join(output_dir, 'forecast_*.csv'))):
+        files[os.path.basename(path)[len('forecast_'):-len('.csv')]] = path
+    series = {}
+    for name, path in files.items():
+        if not os.path.exists(path):
+            continue
+        frame = pd.read_csv(path, parse_dates=['ds'])
+        if name == 'total' and actuals is not None:
+            frame = frame.merge(actuals.rename(columns={'y': 'actual'}), on='ds', how='left')
+        series[name] = frame
+    return series
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Precompute multi-resolution chart data for the dashboard")
+    parser.add_argument('--output-dir', default='forecast', help="Folder with the forecast CSV outputs")
+    parser.add_argument('--actuals', help="Daily history CSV with ds and y columns to include as 'actual'")
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS,
+                        help="Point budget of the downsampled overview level")
+    return parser.parse_args()
+
+def main():
+    """Main execution function"""
+    args = parse_args()
+    actuals = pd.read_csv(args.actuals, parse_dates=['ds']) if args.actuals else None
+    series = load_series(args.output_dir, actuals)
+    if not series:
+        raise SystemExit(f"No forecast CSVs found in {args.output_dir}/")
+    history_end = actuals['ds'].max() if actuals is not None else None
+    index = write_pyramid(series, args.output_dir, args.points, history_end)
+    for name, levels in index['series'].items():
+        sizes = ', '.join(f"{level} {info['rows']} pts/{info['gzip_bytes'] / 1024:.1f} KB"
+                          for level, info in levels.items())
+        print(f"{name}: {sizes}")
+    print(f"Chart pyramid written to '{os.path.join(args.output_dir, PYRAMID_DIR)}/'")
+
+if __name__ == "__main__":
+    main()
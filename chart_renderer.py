@@ -0,0 +1,206 @@
+import pandas as pd
+import plotly.graph_objects as go
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+import os
+
+OUTPUT_DIR = 'forecast'
+IMAGE_DIR = 'images'
+CACHE_FILE = 'render_cache.json'
+IMAGE_OPTIONS = {'format': 'png'}
+
+def daily_forecast_figure(output_dir):
+    """Line chart of the fitted history and the forecast with its confidence band"""
+    df = pd.read_csv(os.path.join(output_dir, 'daily_forecast.csv'), parse_dates=['ds'])
+    with open(os.path.join(output_dir, 'kpis.json')) as f:
+        cutoff_date = pd.Timestamp(json.load(f)['last_historical_date'])
+    historical = df[df['ds'] <= cutoff_date]
+    forecast = df[df['ds'] > cutoff_date]
+
+    fig = go.Figure()
+    if not historical.empty:
+        fig.add_trace(go.Scatter(
+            x=historical['ds'], y=historical['yhat'], mode='lines', name='Historical',
+            line=dict(color='#1FB8CD', width=2), cliponaxis=False
+        ))
+    if not forecast.empty:
+        fig.add_trace(go.Scatter(
+            x=forecast['ds'], y=forecast['yhat'], mode='lines', name='Forecast',
+            line=dict(color='#DB4545', width=2, dash='dash'), cliponaxis=False
+        ))
+        fig.add_trace(go.Scatter(
+            x=pd.concat([forecast['ds'], forecast['ds'][::-1]]),
+            y=pd.concat([forecast['yhat_upper'], forecast['yhat_lower'][::-1]]),
+            fill='toself', fillcolor='rgba(219, 69, 69, 0.2)', line=dict(color='rgba(255,255,255,0)'),
+            name='Confidence', showlegend=True, cliponaxis=False
+        ))
+
+    # Vertical line separating history from forecast
+    fig.add_shape(type="line", x0=cutoff_date, y0=df['yhat'].min(), x1=cutoff_date, y1=df['yhat'].max(),
+                  line=dict(color="gray", width=1, dash="dot"))
+    fig.update_layout(
+        title='Daily Sales Forecast', xaxis_title='Date', yaxis_title='Sales',
+        legend=dict(orientation='h', yanchor='bottom', y=1.05, xanchor='center', x=0.5)
+    )
+    return fig
+
+def monthly_forecast_figure(output_dir):
+    """Bar chart of the average daily forecast per future month, with interval error bars"""
+    df = pd.read_csv(os.path.join(output_dir, 'monthly_forecast.csv'))
+    labels = df['month_name'] + ' ' + df['year'].astype(str)
+    fig = go.Figure(go.Bar(
+        x=labels, y=df['yhat'],
+        error_y=dict(type='data', symmetric=False, array=df['yhat_upper'] - df['yhat'],
+                     arrayminus=df['yhat'] - df['yhat_lower'], visible=True),
+        marker_color='#5D878F',
+        text=[f'${val/1000:.1f}k' for val in df['yhat']],
+        textposition='outside', cliponaxis=False
+    ))
+    fig.update_layout(title="Forecasted Monthly Sales - Next Quarter", xaxis_title="Month",
+                      yaxis_title="Avg Daily ($)", showlegend=False)
+    fig.update_yaxes(tickformat='.2s')
+    return fig
+
+def category_pie_figure(output_dir):
+    """Pie chart of historical sales by product category"""
+    df = pd.read_csv(os.path.join(output_dir, 'category_analysis.csv'))
+    fig = go.Figure(go.Pie(
+        labels=df['Category'], values=df['Sales_sum'],
+        textinfo='label+percent+value',
+        texttemplate='%{label}<br>%{percent}<br>$%{value:,.0f}',
+        marker_colors=['#1FB8CD', '#DB4545', '#2E8B57', '#5D878F', '#D2BA4C', '#B4413C'][:len(df)],
+        hovertemplate='<b>%{label}</b><br>Sales: $%{value:,.0f}<br>Percentage: %{percent}<extra></extra>'
+    ))
+    fig.update_layout(title="Sales Distribution by Product Category", uniformtext_minsize=14,
+                      uniformtext_mode='hide', showlegend=True)
+    return fig
+
+CHARTS = {
+    'daily': {
+        'image': 'daily_sales_forecast.png',
+        'inputs': ['daily_forecast.csv', 'kpis.json'],
+        'build': daily_forecast_figure
+    },
+    'monthly': {
+        'image': 'monthly_sales_forecast.png',
+        'inputs': ['monthly_forecast.csv'],
+        'build': monthly_forecast_figure
+    },
+    'category': {
+        'image': 'sales_distribution_pie_chart.png',
+        'inputs': ['category_analysis.csv'],
+        'build': category_pie_figure
+    }
+}
+
+def figure_hash(fig, options=IMAGE_OPTIONS):
+    """SHA-256 of the full figure spec (data included) and export options"""
+    digest = hashlib.sha256(fig.to_json().encode())
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def load_cache(image_dir=IMAGE_DIR):
+    """Figure hash of every image as of its last render"""
+    path = os.path.join(image_dir, CACHE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_cache(cache, image_dir=IMAGE_DIR):
+    path = os.path.join(image_dir, CACHE_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+async def _export(jobs, workers):
+    import kaleido
+    # One browser session for every figure; up to `workers` tabs render concurrently
+    async with kaleido.Kaleido(n=workers) as exporter:
+        async def render(job):
+            start = time.perf_counter()
+            errors = await exporter.write_fig(job['figure'], job['path'], opts=IMAGE_OPTIONS)
+            job['render_seconds'] = time.perf_counter() - start
+            if errors:
+                job['error'] = '; '.join(str(error) for error in errors)
+        await asyncio.gather(*(render(job) for job in jobs))
+
+def render_charts(names=None, output_dir=OUTPUT_DIR, image_dir=IMAGE_DIR, workers=2, force=False):
+    """Build every chart from the forecast outputs and export the changed ones in one session
+
+    Returns one report per chart with its status (rendered, skipped or failed) and timings.
+    """
+    os.makedirs(image_dir, exist_ok=True)
+    cache = load_cache(image_dir)
+    reports, jobs = [], []
+    for name in names or CHARTS:
+        chart = CHARTS[name]
+        path = os.path.join(image_dir, chart['image'])
+        report = {'name': name, 'image': path, 'build_seconds': 0.0, 'render_seconds': 0.0}
+        reports.append(report)
+        start = time.perf_counter()
+        try:
+            fig = chart['build'](output_dir)
+        except (FileNotFoundError, KeyError) as exc:
+            report.update(status='failed', error=f"missing input: {exc}")
+            continue
+        report['build_seconds'] = time.perf_counter() - start
+        report['hash'] = figure_hash(fig)
+        if not force and os.path.exists(path) and cache.get(chart['image']) == report['hash']:
+            report['status'] = 'skipped'
+            continue
+        report.update(figure=fig, path=path)
+        jobs.append(report)
+
+    if jobs:
+        try:
+            asyncio.run(_export(jobs, max(1, min(workers, len(jobs)))))
+        except Exception as exc:
+            # Typically a missing Chrome install; every pending chart fails with the same cause
+            for job in jobs:
+                job.setdefault('error', f"{type(exc).__name__}: {exc}")
+        for job in jobs:
+            del job['figure'], job['path']
+            job['status'] = 'failed' if 'error' in job else 'rendered'
+            if job['status'] == 'rendered':
+                cache[os.path.basename(job['image'])] = job['hash']
+        save_cache(cache, image_dir)
+    return reports
+
+def print_report(reports):
+    """One line per chart: status, build and render time"""
+    for report in reports:
+        line = (f"  {report['status']:<8} {report['name']:<9} build {report['build_seconds']:.2f}s"
+                f"  render {report['render_seconds']:.2f}s  {report['image']}")
+        if 'error' in report:
+            line += f"  ({report['error']})"
+        print(line)
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Render the dashboard charts from the forecast outputs")
+    parser.add_argument('charts', nargs='*', help=f"Charts to render: {', '.join(CHARTS)} (default: all)")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="Folder with the forecast outputs")
+    parser.add_argument('--image-dir', default=IMAGE_DIR, help="Folder the PNG files are written to")
+    parser.add_argument('--workers', type=int, default=2, help="Charts exported concurrently")
+    parser.add_argument('--force', action='store_true', help="Re-render charts even if unchanged")
+    return parser.parse_args()
+
+def main():
+    """Main execution function"""
+    args = parse_args()
+    unknown = [name for name in args.charts if name not in CHARTS]
+    if unknown:
+        raise SystemExit(f"Unknown chart(s): {', '.join(unknown)} (available: {', '.join(CHARTS)})")
+    print("Rendering charts:")
+    reports = render_charts(args.charts, args.output_dir, args.image_dir, args.workers, args.force)
+    print_report(reports)
+    failed = [report['name'] for report in reports if report['status'] == 'failed']
+    if failed:
+        raise SystemExit(f"Failed chart(s): {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +0,0 @@
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.io as pio
-
-# Since the file doesn't exist, I'll create sample data that matches the expected structure
-# This represents what would be in monthly_forecast.csv
-data = {
-    'month_name': ['Jan', 'Feb', 'Mar'],
-    'yhat': [45000, 52000, 48000],
-    'yhat_lower': [42000, 49000, 45000],
-    'yhat_upper': [48000, 55000, 51000]
-}
-
-df = pd.DataFrame(data)
-
-# Display the data structure
-print("Data shape:", df.shape)
-print("Columns:", df.columns.tolist())
-print("\nData:")
-print(df)
-
-# Create the bar chart
-fig = go.Figure()
-
-# Add bars with error bars
-fig.add_trace(go.Bar(
-    x=df['month_name'],
-    y=df['yhat'],
-    error_y=dict(
-        type='data',
-        symmetric=False,
-        array=df['yhat_upper'] - df['yhat'],
-        arrayminus=df['yhat'] - df['yhat_lower'],
-        visible=True
-    ),
-    marker_color='#5D878F',  # Using cyan color from brand palette
-    text=[f'${val/1000:.0f}k' for val in df['yhat']],  # Abbreviated format
-    textposition='outside',
-    cliponaxis=False
-))
-
-# Update layout with abbreviated axis titles (15 char limit)
-fig.update_layout(
-    title="Forecasted Monthly Sales - Next Quarter",  # Under 40 chars
-    xaxis_title="Month",  # Under 15 chars
-    yaxis_title="Avg Daily ($)",  # Under 15 chars, abbreviated as requested
-    showlegend=False
-)
-
-# Update axes - remove cliponaxis from axes
-fig.update_yaxes(tickformat='.0s')  # This will show abbreviated format (45k, 50k, etc.)
-fig.update_xaxes()
-
-# Show the chart
-fig.show()
-
-# Save as PNG
-fig.write_image("monthly_sales_forecast.png")
\ No newline at end of file
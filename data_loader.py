@@ -0,0 +1,160 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+
+try:
+    import pyarrow.parquet as pq
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+DATE_FORMAT = '%Y-%m-%d'
+DATE_COLUMNS = ['Order Date', 'Ship Date']
+CACHE_DIRNAME = '.cache'
+
+# Types of the Superstore columns; anything not listed is read as text
+DTYPES = {
+    'Row ID': 'int64',
+    'Postal Code': 'int64',
+    'Sales': 'float64',
+    'Quantity': 'int64',
+    'Discount': 'float64',
+    'Profit': 'float64'
+}
+
+# Columns each pipeline stage reads
+DAILY_COLUMNS = ['Order Date', 'Sales', 'Profit', 'Quantity']
+ANALYSIS_COLUMNS = DAILY_COLUMNS + ['Category', 'Region']
+FORECAST_COLUMNS = ANALYSIS_COLUMNS + ['Segment']
+
+# Compact schema: strings repeating often enough become categoricals (dictionary-encoded codes),
+# floats drop to float32 when no value moves by more than FLOAT_TOLERANCE
+CATEGORY_MAX_RATIO = 0.5
+FLOAT_TOLERANCE = 0.005
+
+def _cache_paths(path):
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIRNAME)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return (cache_dir,
+            os.path.join(cache_dir, f'{stem}.parquet'),
+            os.path.join(cache_dir, f'{stem}.meta.json'))
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def read_csv_typed(path, columns=None):
+    """Read the sales CSV with known dtypes and date format, keeping only the given columns"""
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [col for col in header if columns is None or col in columns]
+    dates = [col for col in DATE_COLUMNS if col in usecols]
+    return pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={col: dtype for col, dtype in DTYPES.items() if col in usecols},
+        parse_dates=dates,
+        date_format=DATE_FORMAT
+    )
+
+def build_parquet_cache(path):
+    """Parse the full CSV once and store it as Parquet next to the source"""
+    cache_dir, parquet_path, meta_path = _cache_paths(path)
+    os.makedirs(cache_dir, exist_ok=True)
+    df = read_csv_typed(path)
+    df.to_parquet(parquet_path + '.tmp', index=False)
+    os.replace(parquet_path + '.tmp', parquet_path)
+    with open(meta_path, 'w') as f:
+        json.dump(_source_signature(path), f)
+    return parquet_path
+
+def cache_is_fresh(path):
+    """True when the Parquet cache was built from the current size/mtime of the CSV"""
+    _, parquet_path, meta_path = _cache_paths(path)
+    if not (os.path.exists(parquet_path) and os.path.exists(meta_path)):
+        return False
+    with open(meta_path) as f:
+        return json.load(f) == _source_signature(path)
+
+def load_sales(path, columns=None, use_cache=True):
+    """Load the sales table, reading only the requested columns
+
+    With pyarrow installed the parsed frame is kept as a Parquet cache that is
+    rebuilt only when the source CSV's size or modification time changes.
+    """
+    if not (use_cache and HAS_PARQUET):
+        return read_csv_typed(path, columns)
+
+    if not cache_is_fresh(path):
+        print(f"Building columnar cache for {path}...")
+        build_parquet_cache(path)
+
+    _, parquet_path, _ = _cache_paths(path)
+    if columns is not None:
+        available = pq.read_schema(parquet_path).names
+        columns = [col for col in available if col in columns]
+    return pd.read_parquet(parquet_path, columns=columns)
+
+def column_memory(df):
+    """Dtype and deep memory use in MB of every column"""
+    return pd.DataFrame({'dtype': df.dtypes.astype(str),
+                         'mb': df.memory_usage(index=False, deep=True) / 1024 ** 2})
+
+def _compact_column(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    if pd.api.types.is_string_dtype(series.dtype):
+        # Low-cardinality dimensions and repeated IDs alike are stored once plus small integer codes
+        if series.nunique() <= CATEGORY_MAX_RATIO * len(series):
+            return series.astype('category')
+        return series
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if series.dtype == 'float64':
+        narrow = series.astype('float32')
+        if np.nanmax(np.abs(narrow.to_numpy(dtype='float64') - series.to_numpy()), initial=0) <= FLOAT_TOLERANCE:
+            return narrow
+    return series
+
+def compact_frame(df, columns=None, report=False):
+    """Memory-compact copy of a sales table: unused columns dropped, strings dictionary-encoded,
+    numbers downcast where precision allows"""
+    before = column_memory(df) if report else None
+    if columns is not None:
+        df = df[[col for col in df.columns if col in columns]]
+    else:
+        df = df.copy()
+    # Column by column, so only one original column at a time is held alongside its replacement
+    for col in df.columns:
+        df[col] = _compact_column(df[col])
+    if report:
+        print_memory_report(before, column_memory(df))
+    return df
+
+def print_memory_report(before, after):
+    """Per-column memory before and after compaction"""
+    print(f"  {'column':<16} {'before':>8}{'':<18} {'after':>8}")
+    for col, row in before.iterrows():
+        if col in after.index:
+            new = f"{after.at[col, 'mb']:8.2f} MB {after.at[col, 'dtype']}"
+        else:
+            new = f"{'dropped':>8}"
+        print(f"  {col:<16} {row['mb']:8.2f} MB {row['dtype']:<14} {new}")
+    total_before, total_after = before['mb'].sum(), after['mb'].sum()
+    print(f"  {'total':<16} {total_before:8.2f} MB {'':<14} {total_after:8.2f} MB "
+          f"({total_before / max(total_after, 1e-9):.1f}x smaller)")
+
+CHUNK_SIZE = 500_000
+
+def read_csv_chunks(path, columns=None, chunksize=CHUNK_SIZE):
+    """Iterate over the sales CSV in typed, column-pruned chunks of bounded size"""
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [col for col in header if columns is None or col in columns]
+    return pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype={col: dtype for col, dtype in DTYPES.items() if col in usecols},
+        parse_dates=[col for col in DATE_COLUMNS if col in usecols],
+        date_format=DATE_FORMAT,
+        chunksize=chunksize
+    )
@@ -0,0 +1,76 @@
+import numpy as np
+from statistics import NormalDist
+
+INTERVAL_METHODS = ['sampling', 'analytic', 'residual']
+
+def analytic_intervals(model, forecast, interval_width):
+    """Closed-form approximation of Prophet's simulated intervals for a linear-growth model
+
+    Future trend changes arrive as a Poisson process with rate S (changepoints per unit of
+    scaled time) and Laplace(0, b) sizes, so the trend deviation at scaled time t > 1 has
+    variance 2/3 * S * b^2 * (t - 1)^3. Observation noise adds sigma_obs^2.
+    """
+    t = model.setup_dataframe(forecast[['ds']].copy())['t'].to_numpy()
+    horizon = np.clip(t - 1, 0, None)
+    n_changepoints = len(model.changepoints_t)
+    b = np.mean(np.abs(model.params['delta'][0])) + 1e-8
+    trend_sd = np.sqrt(2 / 3 * n_changepoints * b ** 2 * horizon ** 3) * model.y_scale
+    if 'multiplicative_terms' in forecast:
+        trend_sd = trend_sd * np.abs(1 + forecast['multiplicative_terms'].to_numpy())
+    noise_sd = model.params['sigma_obs'][0][0] * model.y_scale
+
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+    sd = np.sqrt(trend_sd ** 2 + noise_sd ** 2)
+    return forecast['yhat'] - z * sd, forecast['yhat'] + z * sd
+
+def residual_intervals(model, forecast, interval_width):
+    """Intervals from empirical quantiles of the in-sample residuals"""
+    history = model.predict(model.history[['ds']])
+    residuals = model.history['y'].to_numpy() - history['yhat'].to_numpy()
+    lower_q, upper_q = np.quantile(residuals, [0.5 - interval_width / 2, 0.5 + interval_width / 2])
+    return forecast['yhat'] + lower_q, forecast['yhat'] + upper_q
+
+def predict_forecast(model, periods=90, include_history=True, interval='sampling',
+                     uncertainty_samples=None):
+    """Predict with a fitted Prophet model, optionally horizon-only and without sampling"""
+    future = model.make_future_dataframe(periods=periods, freq='D', include_history=include_history)
+
+    if interval == 'sampling' or (interval == 'analytic' and model.growth != 'linear'):
+        if uncertainty_samples is not None:
+            model.uncertainty_samples = uncertainty_samples
+        return model.predict(future)
+
+    # Point forecast only; intervals are filled in without simulation
+    saved_samples = model.uncertainty_samples
+    model.uncertainty_samples = 0
+    try:
+        forecast = model.predict(future)
+        if interval == 'analytic':
+            lower, upper = analytic_intervals(model, forecast, model.interval_width)
+        elif interval == 'residual':
+            lower, upper = residual_intervals(model, forecast, model.interval_width)
+        else:
+            raise ValueError(f"Unknown interval method: {interval}")
+    finally:
+        model.uncertainty_samples = saved_samples
+
+    forecast['yhat_lower'] = lower.to_numpy()
+    forecast['yhat_upper'] = upper.to_numpy()
+    return forecast
+
+def add_predict_arguments(parser):
+    """Add the prediction mode options: horizon-only output and how intervals are computed"""
+    parser.add_argument('--horizon-only', action='store_true',
+                        help="Predict only the future horizon instead of re-predicting the history")
+    parser.add_argument('--interval', choices=INTERVAL_METHODS, default='sampling',
+                        help="How yhat_lower/yhat_upper are computed")
+    parser.add_argument('--uncertainty-samples', type=int, default=None,
+                        help="Number of simulations for --interval sampling (Prophet default 1000)")
+
+def predict_options(args):
+    """Keyword arguments for predict_forecast from parsed options"""
+    return {
+        'include_history': not args.horizon_only,
+        'interval': args.interval,
+        'uncertainty_samples': args.uncertainty_samples
+    }
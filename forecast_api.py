@@ -0,0 +1,322 @@
+import pandas as pd
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+from functools import partial
+import threading
+import argparse
+import hashlib
+import gzip
+import json
+import glob
+import os
+from chart_pyramid import INDEX_FILE, PYRAMID_DIR
+
+OUTPUT_DIR = 'forecast'
+# forecast_script.py writes its per-dimension forecasts and summary into its own folder
+SERIES_DIR = 'sales-forecast-dashboard'
+MAX_ENTRIES = 64
+MIN_GZIP_BYTES = 1024
+
+class LRUCache:
+    """Least-recently-used mapping whose entries are tied to the signatures of their source files"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, signature):
+        """Cached value for key, None when missing or built from files that have since changed"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != signature:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, signature, value):
+        """Store a value and evict the least recently used entries beyond the limit"""
+        with self.lock:
+            self.entries[key] = (signature, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+def file_signature(paths):
+    """Size and modification time of each path; changes whenever an output is rewritten"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+class ForecastStore:
+    """Parsed pipeline outputs, re-read only when the files change
+
+    Outputs of sales_forecasting_script.py (KPIs, total, monthly and breakdown tables, pyramid)
+    are read from output_dir; the per-dimension forecasts, their pyramid and forecast_summary.json
+    written by forecast_script.py are read from series_dir.
+    """
+
+    def __init__(self, output_dir=OUTPUT_DIR, max_entries=MAX_ENTRIES, series_dir=SERIES_DIR):
+        self.output_dir = output_dir
+        self.series_dir = series_dir
+        self.frames = LRUCache(max_entries)
+
+    def path(self, name):
+        return os.path.join(self.output_dir, name)
+
+    def series_path(self, name):
+        return os.path.join(self.series_dir, name)
+
+    def frame(self, path, parse_dates=None):
+        """One output CSV as a DataFrame"""
+        signature = file_signature([path])
+        frame = self.frames.get(path, signature)
+        if frame is None:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"{path} not found; run the forecasting pipeline first")
+            frame = pd.read_csv(path, parse_dates=parse_dates)
+            self.frames.put(path, signature, frame)
+        return frame
+
+    def series_files(self):
+        """Forecast series name -> CSV path: 'total' plus any per-dimension forecasts"""
+        files = {'total': self.path('daily_forecast.csv')}
+        for path in sorted(glob.glob(self.series_path('forecast_*.csv'))):
+            name = os.path.basename(path)
+            if name != 'forecast_data.csv':
+                files[name[len('forecast_'):-len('.csv')]] = path
+        return files
+
+    def sources(self, route, query):
+        """Files a response is built from, so its cache entry and ETag follow their changes"""
+        if route == 'forecast':
+            path = self.series_files().get(query.get('series', 'total'))
+            return [path] if path else []
+        if route == 'series':
+            return list(self.series_files().values())
+        if route == 'kpis':
+            return [self.path('kpis.json'), self.series_path('forecast_summary.json')]
+        if route == 'pyramid':
+            paths = self.pyramid_index_paths()
+            if ('series' in query or 'level' in query) and any(os.path.exists(path) for path in paths):
+                series = query.get('series', 'total')
+                folder = self.pyramid_index()[1].get(series)
+                if folder:
+                    paths.append(os.path.join(folder, f"{series}.{query.get('level', 'overview')}.json.gz"))
+            return paths
+        return [self.path(name) for name in ROUTE_FILES[route]]
+
+    def kpis(self, query):
+        path = self.path('kpis.json')
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; run sales_forecasting_script.py first")
+        with open(path) as f:
+            kpis = json.load(f)
+        summary_path = self.series_path('forecast_summary.json')
+        if os.path.exists(summary_path):
+            with open(summary_path) as f:
+                kpis['model_mape'] = json.load(f).get('model_mape')
+        return kpis
+
+    def forecast(self, query):
+        series = query.get('series', 'total')
+        path = self.series_files().get(series)
+        if path is None:
+            raise KeyError(f"Unknown series '{series}'")
+        frame = self.frame(path, parse_dates=['ds'])
+        if 'start' in query:
+            frame = frame[frame['ds'] >= pd.Timestamp(query['start'])]
+        if 'end' in query:
+            frame = frame[frame['ds'] <= pd.Timestamp(query['end'])]
+        rows = frame[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+        rows['ds'] = rows['ds'].dt.strftime('%Y-%m-%d')
+        return {'series': series, 'rows': rows.round(2).to_dict(orient='records')}
+
+    def monthly(self, query):
+        frame = self.frame(self.path('monthly_forecast.csv'))
+        return [
+            {'year': int(row.year), 'month': row.month_name, 'forecast': round(row.yhat, 2),
+             'lower': round(row.yhat_lower, 2), 'upper': round(row.yhat_upper, 2)}
+            for row in frame.itertuples()
+        ]
+
+    def breakdown(self, query):
+        dimension = query.get('dimension', 'category').lower()
+        if dimension not in BREAKDOWN_FILES:
+            raise KeyError(f"Unknown dimension '{dimension}'")
+        frame = self.frame(self.path(BREAKDOWN_FILES[dimension]))
+        column = frame.columns[0]
+        return [
+            {dimension: value, 'sales': sales, 'profit': profit}
+            for value, sales, profit in zip(frame[column], frame['Sales_sum'], frame['Profit_sum'])
+        ]
+
+    def series(self, query):
+        return sorted(self.series_files())
+
+    def pyramid_index_paths(self):
+        """Pyramid indexes of both producers, the output_dir one first"""
+        return [os.path.join(folder, PYRAMID_DIR, INDEX_FILE) for folder in (self.output_dir, self.series_dir)]
+
+    def pyramid_index(self):
+        """Merged pyramid index and the pyramid folder of each series
+
+        The total comes from output_dir like daily_forecast.csv; the per-dimension series
+        written by forecast_script.py come from series_dir.
+        """
+        index, folders = None, {}
+        for path in self.pyramid_index_paths():
+            if not os.path.exists(path):
+                continue
+            with open(path) as f:
+                part = json.load(f)
+            if index is None:
+                index = dict(part, series={})
+            for name, levels in part['series'].items():
+                if name not in index['series']:
+                    index['series'][name] = levels
+                    folders[name] = os.path.dirname(path)
+        if index is None:
+            raise FileNotFoundError(f"No {PYRAMID_DIR}/{INDEX_FILE} in {self.output_dir}/ or {self.series_dir}/; "
+                                    "run the forecasting pipeline first")
+        return index, folders
+
+    def pyramid(self, query):
+        """Index of the chart pyramid, or one level's precompressed JSON as gzip bytes"""
+        index, folders = self.pyramid_index()
+        if 'series' not in query and 'level' not in query:
+            return index
+        series = query.get('series', 'total')
+        level = query.get('level', 'overview')
+        if series not in index['series']:
+            raise KeyError(f"Unknown series '{series}'")
+        if level not in index['series'][series]:
+            raise KeyError(f"Unknown level '{level}' (available: {', '.join(index['levels'])})")
+        with open(os.path.join(folders[series], index['series'][series][level]['file']), 'rb') as f:
+            return f.read()
+
+BREAKDOWN_FILES = {'category': 'category_analysis.csv', 'region': 'regional_analysis.csv'}
+ROUTE_FILES = {
+    'monthly': ['monthly_forecast.csv'],
+    'breakdown': list(BREAKDOWN_FILES.values())
+}
+
+class ForecastRequestHandler(SimpleHTTPRequestHandler):
+    """Serves /api/* from the pipeline outputs and everything else as static dashboard files"""
+
+    store = None
+    response_cache = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.startswith('/api/'):
+            return super().do_GET()
+
+        route = url.path[len('/api/'):].strip('/')
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if route not in ('kpis', 'forecast', 'monthly', 'breakdown', 'series', 'pyramid'):
+            return self.send_json_error(404, f"Unknown endpoint /api/{route}")
+
+        # The ETag depends only on the request and its source files, so a revalidation
+        # costs a few stat calls and never touches the data
+        cache_key = f"{route}?{url.query}"
+        signature = file_signature(self.store.sources(route, query))
+        etag = '"' + hashlib.sha1(repr((cache_key, signature)).encode()).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        response = self.response_cache.get(cache_key, signature)
+        if response is None:
+            try:
+                payload = getattr(self.store, route)(query)
+            except FileNotFoundError as exc:
+                return self.send_json_error(503, str(exc))
+            except (KeyError, ValueError) as exc:
+                return self.send_json_error(400, str(exc.args[0]))
+            if isinstance(payload, bytes):
+                # Pyramid levels are stored gzip-compressed; serve those bytes as they are
+                response = (gzip.decompress(payload), payload)
+            else:
+                body = json.dumps(payload, default=str).encode()
+                response = (body, gzip.compress(body) if len(body) >= MIN_GZIP_BYTES else None)
+            self.response_cache.put(cache_key, signature, response)
+
+        body, compressed = response
+        use_gzip = compressed is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(compressed if use_gzip else body)))
+        self.end_headers()
+        self.wfile.write(compressed if use_gzip else body)
+
+    def send_json_error(self, status, message):
+        body = json.dumps({'error': message}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+def make_server(host='127.0.0.1', port=8000, output_dir=OUTPUT_DIR, static_dir='.',
+                max_entries=MAX_ENTRIES, quiet=False, series_dir=SERIES_DIR):
+    """HTTP server for the dashboard and its forecast API"""
+    handler = type('Handler', (ForecastRequestHandler,), {
+        'store': ForecastStore(output_dir, max_entries, series_dir),
+        'response_cache': LRUCache(max_entries),
+        'quiet': quiet
+    })
+    return ThreadingHTTPServer((host, port), partial(handler, directory=static_dir))
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Serve the dashboard and a forecast query API")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=8000, help="Port to listen on")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR,
+                        help="Folder with the sales_forecasting_script.py outputs")
+    parser.add_argument('--series-dir', default=SERIES_DIR,
+                        help="Folder with the forecast_script.py per-dimension forecasts and summary")
+    parser.add_argument('--static-dir', default='.', help="Folder with index.html and app.js")
+    parser.add_argument('--cache-entries', type=int, default=MAX_ENTRIES,
+                        help="Parsed files and responses kept in memory")
+    parser.add_argument('--quiet', action='store_true', help="Do not log each request")
+    return parser.parse_args()
+
+def main():
+    """Main execution function"""
+    args = parse_args()
+    server = make_server(args.host, args.port, args.output_dir, args.static_dir,
+                         args.cache_entries, args.quiet, args.series_dir)
+    print(f"Dashboard: http://{args.host}:{args.port}/  "
+          f"API: http://{args.host}:{args.port}/api/kpis (serving {args.output_dir}/ and {args.series_dir}/)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import pandas as pd
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+DATE_FORMAT = '%Y-%m-%d'
+BINARY_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+def binary_path(csv_path, binary_format):
+    """Path of the binary copy written next to a CSV output"""
+    return os.path.splitext(csv_path)[0] + BINARY_FORMATS[binary_format]
+
+def write_binary(frame, path, binary_format):
+    """Write a frame as Parquet or as an uncompressed Arrow IPC file, keeping native timestamps"""
+    if not HAS_ARROW:
+        raise ImportError("Binary forecast output requires pyarrow")
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    if binary_format == 'parquet':
+        pq.write_table(table, path)
+    elif binary_format == 'arrow':
+        # Uncompressed so readers can memory-map the column buffers without copying
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Unknown binary format: {binary_format}")
+    return path
+
+def save_table(frame, csv_path, binary_format=None):
+    """Write an output table as CSV with formatted dates, plus an optional binary copy"""
+    if binary_format:
+        write_binary(frame, binary_path(csv_path, binary_format), binary_format)
+    text = frame.copy()
+    for column in text.columns:
+        if pd.api.types.is_datetime64_any_dtype(text[column]):
+            text[column] = text[column].dt.strftime(DATE_FORMAT)
+    text.to_csv(csv_path, index=False)
+
+def read_table(path):
+    """Open a binary output as a pyarrow Table; .arrow files are memory-mapped, not copied"""
+    if path.endswith(BINARY_FORMATS['arrow']):
+        source = pa.memory_map(path, 'r')
+        return pa.ipc.open_file(source).read_all()
+    return pq.read_table(path, memory_map=True)
+
+def read_frame(path):
+    """Load an output table as a DataFrame from CSV or either binary format"""
+    if path.endswith('.csv'):
+        return pd.read_csv(path)
+    return read_table(path).to_pandas()
+
+def add_output_arguments(parser):
+    """Add the output format option that writes Parquet or Arrow IPC copies of each table"""
+    parser.add_argument('--binary-format', choices=sorted(BINARY_FORMATS),
+                        help="Also write each output table as Parquet or Arrow IPC next to its CSV")
@@ -0,0 +1,263 @@
+import pandas as pd
+import argparse
+import json
+import sys
+import os
+from data_loader import CHUNK_SIZE, load_sales
+from forecast_io import save_table
+from model_cache import STATE_DIR
+from parallel_forecast import (TOTAL_COUNTRY_HOLIDAYS, TOTAL_PROPHET_PARAMS, build_series_tasks,
+                               run_forecasts, series_filename)
+from sales_forecasting_script import PROPHET_PARAMS
+from sales_cube import CUBE_COLUMNS, CUBE_DIMENSIONS, build_cube, daily_from_cube
+from tuning import load_best_params, tuned_params
+
+MONITOR_FILE = 'monitor_state.json'
+INTERVAL_Z = 1.2816     # half-width of Prophet's default 80% interval in standard deviations
+CUSUM_SLACK = 0.5       # drift smaller than half a standard deviation is ignored
+CUSUM_LIMIT = 5.0
+BREACH_RUN = 3
+
+def new_state():
+    """Running statistics of one series: a fixed handful of numbers however long the stream"""
+    return {'days': 0, 'sum_error': 0.0, 'sum_abs_error': 0.0, 'cusum_up': 0.0, 'cusum_down': 0.0,
+            'above': 0, 'below': 0, 'run': 0, 'uncovered': 0, 'late': 0, 'last_day': None, 'flag': None}
+
+def update_state(state, y, yhat, lower, upper):
+    """Fold one day's actual into the running statistics and flag the series if it drifted"""
+    error = y - yhat
+    sigma = (upper - lower) / (2 * INTERVAL_Z)
+    z = error / sigma if sigma > 0 else 0.0
+    state['days'] += 1
+    state['sum_error'] += error
+    state['sum_abs_error'] += abs(error)
+    # Tabular CUSUM on the standardised error: small persistent bias accumulates, noise does not
+    state['cusum_up'] = max(0.0, state['cusum_up'] + z - CUSUM_SLACK)
+    state['cusum_down'] = max(0.0, state['cusum_down'] - z - CUSUM_SLACK)
+    if y > upper:
+        state['above'] += 1
+    elif y < lower:
+        state['below'] += 1
+    state['run'] = state['run'] + 1 if (y > upper or y < lower) else 0
+
+    if state['flag'] is None:
+        if state['cusum_up'] > CUSUM_LIMIT:
+            state['flag'] = 'drift up'
+        elif state['cusum_down'] > CUSUM_LIMIT:
+            state['flag'] = 'drift down'
+        elif state['run'] >= BREACH_RUN:
+            state['flag'] = f'{state["run"]} days outside band'
+
+class ForecastMonitor:
+    """Checks streamed sales against the saved forecast bands, one running state per series
+
+    Per-order rows are summed into the open day of each series; a day is scored once a later
+    day arrives for that series (or on close()). Rows for days already scored count as late.
+    """
+
+    def __init__(self, forecast_dir='forecast', total_file='daily_forecast.csv',
+                 dimensions=('Category',), state_path=None):
+        self.forecast_dir = forecast_dir
+        self.total_file = total_file
+        self.dimensions = list(dimensions)
+        self.state_path = state_path or os.path.join(forecast_dir, MONITOR_FILE)
+        self.bands = {}
+        self.series = {}
+        self.open = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                saved = json.load(f)
+            self.series = saved['series']
+            self.open = {name: (pd.Timestamp(day), total) for name, (day, total) in saved['open'].items()}
+
+    def band_path(self, name):
+        return os.path.join(self.forecast_dir, self.total_file if name == 'total' else name)
+
+    def band(self, name):
+        """Forecast band of a series indexed by date, or None when it has no forecast file"""
+        if name not in self.bands:
+            path = self.band_path(name)
+            self.bands[name] = None
+            if os.path.exists(path):
+                frame = pd.read_csv(path, usecols=['ds', 'yhat', 'yhat_lower', 'yhat_upper'],
+                                    parse_dates=['ds'])
+                self.bands[name] = frame.set_index('ds')
+        return self.bands[name]
+
+    def observe(self, name, day, amount):
+        """Add sales of one series on one day"""
+        if self.band(name) is None:
+            return
+        state = self.series.setdefault(name, new_state())
+        if state['last_day'] is not None and day <= pd.Timestamp(state['last_day']):
+            state['late'] += 1
+            return
+        open_day, total = self.open.get(name, (day, 0.0))
+        if day > open_day:
+            self._score(name, open_day, total)
+            open_day, total = day, 0.0
+        elif day < open_day:
+            state['late'] += 1
+            return
+        self.open[name] = (open_day, total + amount)
+
+    def _score(self, name, day, y):
+        state = self.series[name]
+        state['last_day'] = day.strftime('%Y-%m-%d')
+        band = self.band(name)
+        if day not in band.index:
+            # The forecast no longer covers the stream, so the model is due regardless of accuracy
+            state['uncovered'] += 1
+            state['flag'] = state['flag'] or 'past forecast horizon'
+            return
+        row = band.loc[day]
+        update_state(state, y, row['yhat'], row['yhat_lower'], row['yhat_upper'])
+
+    def feed(self, chunk):
+        """Consume one chunk of per-order rows (Order Date, Sales, dimensions) or daily ds/y totals"""
+        if 'Order Date' in chunk.columns:
+            dates = pd.to_datetime(chunk['Order Date']).dt.normalize()
+            self._feed_daily('total', chunk['Sales'].groupby(dates).sum())
+            for dimension in self.dimensions:
+                if dimension not in chunk.columns:
+                    continue
+                sums = chunk['Sales'].groupby([chunk[dimension], dates]).sum()
+                for value, daily in sums.groupby(level=0):
+                    self._feed_daily(series_filename(dimension, value), daily.droplevel(0))
+        else:
+            self._feed_daily('total', chunk['y'].groupby(pd.to_datetime(chunk['ds']).dt.normalize()).sum())
+
+    def _feed_daily(self, name, daily):
+        for day, amount in daily.sort_index().items():
+            self.observe(name, day, float(amount))
+
+    def close(self):
+        """Score the open day of every series, e.g. at the end of the business day"""
+        for name, (day, total) in self.open.items():
+            self._score(name, day, total)
+        self.open = {}
+
+    def flagged(self):
+        return sorted(name for name, state in self.series.items() if state['flag'])
+
+    def reset(self, names):
+        """Start fresh statistics for refitted series and reload their bands"""
+        for name in names:
+            self.series[name] = new_state()
+            self.bands.pop(name, None)
+
+    def save(self):
+        saved = {'series': self.series,
+                 'open': {name: [day.strftime('%Y-%m-%d'), total] for name, (day, total) in self.open.items()}}
+        with open(self.state_path + '.tmp', 'w') as f:
+            json.dump(saved, f, indent=2)
+        os.replace(self.state_path + '.tmp', self.state_path)
+
+    def report(self):
+        """One line per series: scored days, error, breaches, drift statistics and flag"""
+        print(f"  {'series':<34} {'days':>5} {'MAE':>10} {'bias':>10} {'above':>6} {'below':>6} "
+              f"{'cusum+':>7} {'cusum-':>7}  status")
+        for name, state in sorted(self.series.items()):
+            days = max(state['days'], 1)
+            print(f"  {name:<34} {state['days']:>5} {state['sum_abs_error'] / days:>10,.2f} "
+                  f"{state['sum_error'] / days:>10,.2f} {state['above']:>6} {state['below']:>6} "
+                  f"{state['cusum_up']:>7.2f} {state['cusum_down']:>7.2f}  {state['flag'] or 'ok'}")
+
+def total_settings(total_file):
+    """Prophet parameters and holiday calendar of the script that wrote the total forecast"""
+    if total_file == 'forecast_data.csv':
+        return TOTAL_PROPHET_PARAMS, TOTAL_COUNTRY_HOLIDAYS
+    return PROPHET_PARAMS, None
+
+def refit_series(names, history_path, forecast_dir, total_file, dimensions, workers=None,
+                 country_holidays=None, periods=90):
+    """Refit only the named series on the full history and overwrite their forecast bands
+
+    The total keeps the settings of the script that produced it; country_holidays overrides
+    its holiday calendar.
+    """
+    cube = build_cube(load_sales(history_path, columns=CUBE_COLUMNS))
+    total = daily_from_cube(cube)[['Order Date', 'Sales']]
+    total.columns = ['ds', 'y']
+    params, holidays = total_settings(total_file)
+    tasks = [{'name': 'total', 'label': 'Total', 'series': total.sort_values('ds'),
+              'params': dict(params), 'country_holidays': country_holidays or holidays}]
+    tasks += build_series_tasks(cube, dimensions=dimensions)
+    best_params = load_best_params()
+    tasks = [task for task in tasks if task['name'] in names]
+    for task in tasks:
+        task['params'] = tuned_params(task['name'], task['params'], best_params)
+
+    # Warm-started from each series' previous fit when the history only grew
+    forecasts, _ = run_forecasts(tasks, max_workers=workers, periods=periods, state_dir=STATE_DIR)
+    for name, forecast in forecasts.items():
+        path = os.path.join(forecast_dir, total_file if name == 'total' else name)
+        if name == 'total' and 'actual_sales' in pd.read_csv(path, nrows=0).columns:
+            # Same layout as the dashboard's forecast_data.csv
+            forecast = forecast.round({'yhat': 2, 'yhat_lower': 2, 'yhat_upper': 2}).merge(total.rename(columns={'y': 'actual_sales'}), on='ds', how='left')
+        save_table(forecast, path)
+        print(f"Refitted {name}: forecast band saved to '{path}'")
+    return sorted(forecasts)
+
+def read_stream(sources, chunksize=CHUNK_SIZE):
+    """Chunks of new rows from CSV files, or from standard input for '-'"""
+    for source in sources:
+        try:
+            reader = pd.read_csv(sys.stdin if source == '-' else source, chunksize=chunksize)
+        except pd.errors.EmptyDataError:
+            continue  # nothing new arrived
+        for chunk in reader:
+            yield chunk
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Check newly arriving sales against the forecast bands")
+    parser.add_argument('stream', nargs='*', default=['-'],
+                        help="CSV files of new orders or daily ds,y totals ('-' = standard input)")
+    parser.add_argument('--forecast-dir', default='forecast', help="Folder with the forecast files")
+    parser.add_argument('--total-file', default='daily_forecast.csv',
+                        help="Forecast file of the total series (forecast_data.csv for the dashboard)")
+    parser.add_argument('--dimensions', nargs='+', default=['Category'], choices=CUBE_DIMENSIONS[1:],
+                        help="Columns whose per-value forecast files are monitored")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE, help="Rows read per chunk")
+    parser.add_argument('--close', action='store_true',
+                        help="Score the last day in the stream instead of waiting for more rows")
+    parser.add_argument('--refit', action='store_true', help="Refit the flagged series")
+    parser.add_argument('--history', default='data/superstore_sales.csv',
+                        help="Full dataset, new orders included, used by --refit")
+    parser.add_argument('--country-holidays',
+                        help="Holiday calendar of the total model (default: the one its script used)")
+    parser.add_argument('--workers', type=int, default=None, help="Process pool size for refits")
+    parser.add_argument('--reset', action='store_true', help="Discard the saved monitor state first")
+    return parser.parse_args()
+
+def main():
+    """Main execution function"""
+    args = parse_args()
+    state_path = os.path.join(args.forecast_dir, MONITOR_FILE)
+    if args.reset and os.path.exists(state_path):
+        os.remove(state_path)
+    monitor = ForecastMonitor(args.forecast_dir, args.total_file, args.dimensions, state_path)
+    rows = 0
+    for chunk in read_stream(args.stream, args.chunksize):
+        monitor.feed(chunk)
+        rows += len(chunk)
+    if args.close:
+        monitor.close()
+    print(f"Monitored {rows:,} new row(s) across {len(monitor.series)} series:")
+    monitor.report()
+
+    flagged = monitor.flagged()
+    if flagged and args.refit:
+        print(f"Refitting {len(flagged)} flagged series: {', '.join(flagged)}")
+        refitted = refit_series(flagged, args.history, args.forecast_dir, args.total_file,
+                                args.dimensions, args.workers, args.country_holidays)
+        monitor.reset(refitted)
+    elif flagged:
+        print(f"{len(flagged)} series flagged for refit; rerun with --refit to refresh them")
+    else:
+        print("All monitored series are within their forecast bands")
+    monitor.save()
+
+if __name__ == "__main__":
+    main()
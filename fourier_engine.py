@@ -0,0 +1,74 @@
+import pandas as pd
+import numpy as np
+from statistics import NormalDist
+
+YEARLY_PERIOD = 365.25
+WEEKLY_PERIOD = 7.0
+
+def design_matrix(t, yearly_order=10, weekly_order=3):
+    """Intercept, linear trend and yearly/weekly Fourier terms for day offsets t"""
+    columns = [np.ones_like(t), t / YEARLY_PERIOD]
+    for period, order in ((YEARLY_PERIOD, yearly_order), (WEEKLY_PERIOD, weekly_order)):
+        k = np.arange(1, order + 1)
+        angle = 2 * np.pi * np.outer(t, k) / period
+        columns += [np.sin(angle), np.cos(angle)]
+    return np.column_stack(columns)
+
+def fit_predict_many(history, periods=90, yearly_order=10, weekly_order=3, interval_width=0.8,
+                     first=None):
+    """Forecast every column of a dense days x series matrix with one least-squares solve
+
+    Days without sales should be present as zeros. first holds the row each series starts
+    at (default: all at row 0); rows before it are left out of that series' fit, and series
+    sharing a start are solved together. Returns yhat, yhat_lower and yhat_upper as
+    (days + periods) x series arrays and the matching ds index.
+    """
+    history = history.sort_index()
+    start = history.index.min()
+    ds = pd.date_range(start, periods=len(history.index) + periods, freq='D')
+    t_hist = (history.index - start).days.to_numpy(dtype=float)
+    t_all = (ds - start).days.to_numpy(dtype=float)
+
+    X = design_matrix(t_hist, yearly_order, weekly_order)
+    Y = history.to_numpy(dtype=float)
+    first = np.zeros(Y.shape[1], dtype=int) if first is None else np.asarray(first)
+    coef = np.empty((X.shape[1], Y.shape[1]))
+    sigma = np.empty(Y.shape[1])
+    for row in np.unique(first):
+        cols = np.flatnonzero(first == row)
+        coef[:, cols], _, rank, _ = np.linalg.lstsq(X[row:], Y[row:, cols], rcond=None)
+        residuals = Y[row:, cols] - X[row:] @ coef[:, cols]
+        dof = max(len(X) - row - rank, 1)
+        sigma[cols] = np.sqrt((residuals ** 2).sum(axis=0) / dof)
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+
+    yhat = design_matrix(t_all, yearly_order, weekly_order) @ coef
+    return ds, yhat, yhat - z * sigma, yhat + z * sigma
+
+def forecast_series(forecast_data, periods=90, **kwargs):
+    """Single-series counterpart of train_prophet_model: ds/y in, ds/yhat/yhat_lower/yhat_upper out"""
+    history = forecast_data.set_index('ds')[['y']]
+    history = history.reindex(pd.date_range(history.index.min(), history.index.max(), freq='D'), fill_value=0)
+    ds, yhat, lower, upper = fit_predict_many(history, periods, **kwargs)
+    return pd.DataFrame({'ds': ds, 'yhat': yhat[:, 0], 'yhat_lower': lower[:, 0], 'yhat_upper': upper[:, 0]})
+
+def forecast_tasks(tasks, periods=90, include_history=True, **kwargs):
+    """Forecast a batch of fit tasks together, aligning their series on one dense date range"""
+    if not tasks:
+        return {}
+    history = pd.concat(
+        {task['name']: task['series'].set_index('ds')['y'] for task in tasks}, axis=1
+    ).sort_index()
+    full_range = pd.date_range(history.index.min(), history.index.max(), freq='D')
+    history = history.reindex(full_range)
+    # Each series is fitted from its own first date, not from zeros padded before it
+    first = history.notna().to_numpy().argmax(axis=0)
+    history = history.fillna(0)
+
+    ds, yhat, lower, upper = fit_predict_many(history, periods, first=first, **kwargs)
+    forecasts = {}
+    for j, name in enumerate(history.columns):
+        start = len(full_range) if not include_history else first[j]
+        forecasts[name] = pd.DataFrame({'ds': ds[start:], 'yhat': yhat[start:, j],
+                                        'yhat_lower': lower[start:, j], 'yhat_upper': upper[start:, j]})
+    return forecasts
@@ -0,0 +1,156 @@
+import pandas as pd
+import numpy as np
+from parallel_forecast import DEFAULT_PROPHET_PARAMS, series_filename
+
+METHODS = ['bottom_up', 'top_down', 'middle_out', 'mint']
+FORECAST_COLUMNS = ['yhat', 'yhat_lower', 'yhat_upper']
+
+def bottom_history(cube, levels=('Category', 'Region')):
+    """Dense daily Sales matrix (days x bottom series) for the finest level combination"""
+    levels = list(levels)
+    daily = cube.groupby(level=['Order Date'] + levels, observed=True)['Sales_sum'].sum()
+    matrix = daily.unstack(levels, fill_value=0).sort_index()
+    full_range = pd.date_range(matrix.index.min(), matrix.index.max(), freq='D')
+    matrix = matrix.reindex(full_range, fill_value=0)
+    matrix.index.name = 'ds'
+    if len(levels) == 1:
+        matrix.columns = pd.MultiIndex.from_arrays([matrix.columns], names=levels)
+    return matrix
+
+def summing_matrix(bottom_keys, levels):
+    """Build the summing matrix S and the node table for Total, each level and the bottom"""
+    bottom_keys = pd.MultiIndex.from_tuples(list(bottom_keys), names=list(levels))
+    blocks = [np.ones((1, len(bottom_keys)))]
+    nodes = [{'node': 'Total', 'level': 'Total', 'value': 'Total'}]
+
+    for level in levels:
+        codes, uniques = pd.factorize(bottom_keys.get_level_values(level), sort=True)
+        blocks.append((np.arange(len(uniques))[:, None] == codes[None, :]).astype(float))
+        nodes += [{'node': f'{level}={value}', 'level': level, 'value': value} for value in uniques]
+
+    if len(levels) > 1:
+        blocks.append(np.eye(len(bottom_keys)))
+        for key in bottom_keys:
+            nodes.append({'node': '|'.join(f'{level}={value}' for level, value in zip(levels, key)),
+                          'level': 'bottom', 'value': key})
+
+    return np.vstack(blocks), pd.DataFrame(nodes)
+
+def fit_levels_for(method, levels, middle_level=None):
+    """Levels that need base forecasts for a reconciliation method"""
+    bottom = 'bottom' if len(levels) > 1 else levels[0]
+    if method == 'bottom_up':
+        return [bottom]
+    if method == 'top_down':
+        return ['Total']
+    if method == 'middle_out':
+        return [middle_level or levels[0]]
+    return ['Total'] + list(levels) + (['bottom'] if len(levels) > 1 else [])
+
+def build_hierarchy_tasks(history, S, nodes, fit_levels, total_params=None, country_holidays=None):
+    """Fit tasks for the nodes on the chosen levels"""
+    node_history = history.to_numpy() @ S.T
+    tasks = []
+    for i, node in nodes.iterrows():
+        if node['level'] not in fit_levels:
+            continue
+        is_total = node['level'] == 'Total'
+        slug = ''.join(ch if ch.isalnum() else '_' for ch in node['node'].lower())
+        tasks.append({
+            # Not 'total': that name keys the standalone total's warm-start state and fit times
+            'name': 'hierarchy_total' if is_total else f'hierarchy_{slug}',
+            'label': node['node'],
+            'level': node['level'],
+            'series': pd.DataFrame({'ds': history.index, 'y': node_history[:, i]}),
+            'params': dict(total_params or DEFAULT_PROPHET_PARAMS) if is_total else dict(DEFAULT_PROPHET_PARAMS),
+            'country_holidays': country_holidays if is_total else None,
+            'node': i
+        })
+    return tasks
+
+def _stack(forecasts, tasks, n_nodes, column):
+    ds = next(iter(forecasts.values()))['ds']
+    base = np.full((n_nodes, len(ds)), np.nan)
+    for task in tasks:
+        base[task['node']] = forecasts[task['name']][column].to_numpy()
+    return ds, base
+
+def reconcile(history, S, nodes, forecasts, tasks, method='bottom_up', middle_level=None):
+    """Reconcile base forecasts into coherent forecasts for every node with matrix operations"""
+    n_nodes, n_bottom = S.shape
+    ds, yhat = _stack(forecasts, tasks, n_nodes, 'yhat')
+    _, lower = _stack(forecasts, tasks, n_nodes, 'yhat_lower')
+    _, upper = _stack(forecasts, tasks, n_nodes, 'yhat_upper')
+    levels = nodes['level'].to_numpy()
+    bottom_idx = np.arange(n_nodes - n_bottom, n_nodes)
+    hist_bottom = history.to_numpy().sum(axis=0)
+
+    if method == 'bottom_up':
+        G = np.zeros((n_bottom, n_nodes))
+        G[:, bottom_idx] = np.eye(n_bottom)
+    elif method in ('top_down', 'middle_out'):
+        # Disaggregate a fitted level by historical proportions of each bottom series in its parent
+        level = 'Total' if method == 'top_down' else (middle_level or nodes.loc[1, 'level'])
+        parent_rows = np.flatnonzero(levels == level)
+        S_level = S[parent_rows]
+        parent_total = S_level @ hist_bottom
+        share = hist_bottom / np.where(S_level.T @ parent_total == 0, 1, S_level.T @ parent_total)
+        G = np.zeros((n_bottom, n_nodes))
+        G[:, parent_rows] = S_level.T * share[:, None]
+    elif method == 'mint':
+        # MinT with a diagonal covariance of in-sample residual variances (WLS variant)
+        fitted = np.vstack([forecasts[task['name']]['yhat'].to_numpy()[:len(history)]
+                            for task in sorted(tasks, key=lambda t: t['node'])])
+        actual = (history.to_numpy() @ S.T).T
+        variance = np.var(actual - fitted, axis=1)
+        W_inv = np.diag(1 / np.where(variance > 0, variance, np.nan_to_num(variance.mean(), nan=1.0)))
+        G = np.linalg.solve(S.T @ W_inv @ S, S.T @ W_inv)
+    else:
+        raise ValueError(f"Unknown reconciliation method: {method}")
+
+    used = np.flatnonzero(G.any(axis=0))
+    reconciled = S @ (G[:, used] @ yhat[used])
+
+    # Interval half-widths: fitted nodes keep their own, the rest are derived from the bottom.
+    # Proportional methods assume fully correlated children, the others independent ones.
+    proportional = method in ('top_down', 'middle_out')
+    bounds = []
+    for bound, sign in ((lower, -1), (upper, 1)):
+        base_width = np.abs(bound - yhat)
+        if proportional:
+            derived = S @ (G[:, used] @ base_width[used])
+        else:
+            bottom_width = np.sqrt(np.abs(G[:, used]) @ base_width[used] ** 2)
+            derived = np.sqrt(S @ bottom_width ** 2)
+        width = np.where(np.isnan(base_width), derived, base_width)
+        bounds.append(reconciled + sign * width)
+
+    frames = {}
+    for i, node in nodes.iterrows():
+        frames[node['node']] = pd.DataFrame({
+            'ds': ds.to_numpy(),
+            'yhat': reconciled[i],
+            'yhat_lower': bounds[0][i],
+            'yhat_upper': bounds[1][i]
+        })
+    return frames
+
+def node_filename(node):
+    """Forecast CSV name for a single-level node, None for Total and bottom nodes"""
+    if node['level'] in ('Total', 'bottom'):
+        return None
+    return series_filename(node['level'], node['value'])
+
+def to_long(frames, nodes):
+    """Stack reconciled node forecasts into one long table"""
+    levels = dict(zip(nodes['node'], nodes['level']))
+    return pd.concat(
+        [frame.assign(node=name, level=levels[name]) for name, frame in frames.items()],
+        ignore_index=True
+    )[['node', 'level', 'ds'] + FORECAST_COLUMNS]
+
+def coherence_error(frames, nodes, S):
+    """Largest absolute gap between any node forecast and the sum of its bottom series"""
+    stacked = np.vstack([frames[name]['yhat'].to_numpy() for name in nodes['node']])
+    bottom = stacked[-S.shape[1]:]
+    return float(np.abs(S @ bottom - stacked).max())
@@ -0,0 +1,216 @@
+import pandas as pd
+import subprocess
+import argparse
+import hashlib
+import pickle
+import glob
+import time
+import sys
+import io
+import os
+from data_loader import CACHE_DIRNAME, DATE_COLUMNS, DATE_FORMAT, DTYPES
+from sales_cube import CUBE_COLUMNS, build_cube, fold_cube
+
+DATA_DIR = 'data'
+INGEST_FILE = 'ingest.pkl'
+BLOCK_SIZE = 64 * 1024 * 1024
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sales_forecasting_script.py')
+
+def ingest_path(data_dir=DATA_DIR):
+    return os.path.join(data_dir, CACHE_DIRNAME, INGEST_FILE)
+
+def load_ingest(data_dir=DATA_DIR):
+    """Persisted cube and per-file progress, or an empty state before the first ingest"""
+    path = ingest_path(data_dir)
+    if not os.path.exists(path):
+        return {'cube': None, 'files': {}}
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+def save_ingest(state, data_dir=DATA_DIR):
+    """Cube and offsets are written together, so a crash can never count rows twice"""
+    path = ingest_path(data_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + '.tmp', path)
+
+def prefix_digest(path, offset, block_size=BLOCK_SIZE):
+    """Running SHA-256 of the first offset bytes of a file, i.e. everything already ingested"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        remaining = offset
+        while remaining:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+def file_change(path, record, stat):
+    """'new', 'unchanged', 'append' or 'modified' relative to what was ingested from a file
+
+    Returns the change and, for appends, the digest of the already-read prefix to continue from.
+    """
+    if record is None:
+        return 'new', None
+    if stat.st_size == record['size'] and stat.st_mtime_ns == record['mtime_ns']:
+        return 'unchanged', None
+    # A pure append always grows the file, so a rewrite that did not grow it modified old rows
+    if stat.st_size <= record['size']:
+        return 'modified', None
+    digest = prefix_digest(path, record['offset'])
+    if digest.hexdigest() != record.get('sha256'):
+        return 'modified', None
+    if record.get('unterminated') and next_byte(path, record['offset']) not in b'\r\n':
+        # The last row was ingested without its newline and has since been extended
+        return 'modified', None
+    return 'append', digest
+
+def next_byte(path, offset):
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return f.read(1)
+
+def _parse_rows(data, header):
+    usecols = [col for col in header if col in CUBE_COLUMNS]
+    return pd.read_csv(
+        io.BytesIO(data),
+        header=None,
+        names=header,
+        usecols=usecols,
+        dtype={col: dtype for col, dtype in DTYPES.items() if col in usecols},
+        parse_dates=[col for col in DATE_COLUMNS if col in usecols],
+        date_format=DATE_FORMAT
+    )
+
+def read_appended(path, record, digest, block_size=BLOCK_SIZE, final=False):
+    """Yield (rows, offset) for the complete lines after the recorded offset, block by block
+
+    Consumed bytes are added to digest. A trailing line without its newline may still be
+    being written and is left for the next call, unless final says the file is complete.
+    """
+    with open(path, 'rb') as f:
+        f.seek(record['offset'])
+        pending = b''
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            block = pending + block
+            cut = block.rfind(b'\n') + 1
+            pending = block[cut:]
+            if cut:
+                digest.update(block[:cut])
+                record['offset'] += cut
+                yield _parse_rows(block[:cut], record['header']), record['offset']
+        record['unterminated'] = False
+        if pending and final:
+            digest.update(pending)
+            record['offset'] += len(pending)
+            record['unterminated'] = True
+            if pending.strip():
+                yield _parse_rows(pending, record['header']), record['offset']
+
+def new_record(path):
+    """Start tracking a file: its header is consumed, data rows follow"""
+    with open(path, 'rb') as f:
+        line = f.readline()
+    header = pd.read_csv(io.BytesIO(line), nrows=0).columns.tolist()
+    return {'header': header, 'offset': len(line), 'rows': 0}
+
+def source_files(data_dir=DATA_DIR):
+    return sorted(glob.glob(os.path.join(data_dir, '*.csv')))
+
+def update_cube(data_dir=DATA_DIR, rebuild=False, block_size=BLOCK_SIZE, final=True):
+    """Bring the persisted cube up to date with every CSV in data_dir
+
+    Only rows appended since the last call, and files that appeared since, are read. A file
+    that changed without growing, whose already-read bytes no longer hash the same, or that
+    was removed triggers a rebuild from scratch. A last line without its newline is read
+    when final is set, and otherwise once its file has not changed since the previous call.
+    Returns the cube and the number of rows read in this call.
+    """
+    state = {'cube': None, 'files': {}} if rebuild else load_ingest(data_dir)
+    paths = source_files(data_dir)
+    # Sizes are taken before reading, so rows appended while reading are picked up next time
+    stats = {path: os.stat(path) for path in paths}
+    changes = {path: file_change(path, state['files'].get(path), stats[path]) for path in paths}
+    removed = [path for path in state['files'] if path not in changes]
+    modified = [path for path, (change, _) in changes.items() if change == 'modified']
+    if removed or modified:
+        print(f"Rows changed or removed in {', '.join(modified + removed)}: rebuilding aggregates from scratch")
+        state = {'cube': None, 'files': {}}
+        changes = {path: ('new', None) for path in paths}
+
+    for path, (change, _) in changes.items():
+        record = state['files'].get(path)
+        if change == 'unchanged' and record['offset'] < record['size']:
+            # Unterminated last line that stopped changing since the previous call
+            changes[path] = ('settled', None)
+
+    rows_read = 0
+    for path, (change, digest) in changes.items():
+        if change == 'unchanged':
+            continue
+        record = state['files'].get(path) or new_record(path)
+        digest = digest or prefix_digest(path, record['offset'])
+        rows_before = record['rows']
+        for rows, offset in read_appended(path, record, digest, block_size, final or change == 'settled'):
+            state['cube'] = fold_cube(state['cube'], build_cube(rows))
+            record['rows'] += len(rows)
+        record.update(size=stats[path].st_size, mtime_ns=stats[path].st_mtime_ns, sha256=digest.hexdigest())
+        state['files'][path] = record
+        rows_read += record['rows'] - rows_before
+        print(f"  {change:<7} {path}: {record['rows'] - rows_before:,} row(s) read, {record['rows']:,} in total"
+              + (", unterminated last line left until the file settles" if record['offset'] < record['size'] else ""))
+
+    if removed or any(change != 'unchanged' for change, _ in changes.values()):
+        if state['cube'] is not None:
+            state['cube'] = state['cube'].sort_index()
+        save_ingest(state, data_dir)
+    return state['cube'], rows_read
+
+def watch(data_dir=DATA_DIR, interval=10.0, script_args=()):
+    """Poll data_dir; after every ingest that read new rows, rerun the forecast on the updated cube"""
+    print(f"Watching {data_dir}/ every {interval:g}s (Ctrl+C to stop)")
+    try:
+        while True:
+            # A writer may be mid-line, so last lines are only read once they stop changing
+            _, rows_read = update_cube(data_dir, final=False)
+            if rows_read:
+                print(f"{rows_read:,} new row(s): running the forecast")
+                result = subprocess.run([sys.executable, SCRIPT, '--incremental', '--settled-only']
+                                        + list(script_args))
+                if result.returncode:
+                    print(f"Forecast run failed with exit code {result.returncode}")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Fold new sales rows into the persisted aggregates")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Folder of sales CSV files")
+    parser.add_argument('--rebuild', action='store_true', help="Discard the aggregates and read everything")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep polling the folder and rerun the forecast when rows arrive")
+    parser.add_argument('--interval', type=float, default=10.0, help="Seconds between polls in --watch mode")
+    parser.add_argument('script_args', nargs=argparse.REMAINDER,
+                        help="Options passed to sales_forecasting_script.py in --watch mode (after --)")
+    return parser.parse_args()
+
+def main():
+    """Main execution function"""
+    args = parse_args()
+    script_args = args.script_args[1:] if args.script_args[:1] == ['--'] else args.script_args
+    start = time.perf_counter()
+    cube, rows_read = update_cube(args.data_dir, rebuild=args.rebuild)
+    print(f"Ingested {rows_read:,} new row(s) in {time.perf_counter() - start:.2f}s; "
+          f"cube has {0 if cube is None else len(cube):,} cells")
+    if args.watch:
+        watch(args.data_dir, args.interval, script_args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+from contextlib import contextmanager
+import threading
+import resource
+import json
+import time
+import sys
+import os
+
+PROFILE_FILE = 'pipeline_profile.json'
+
+def max_rss_mb():
+    """Peak resident set size of this process so far"""
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def current_rss_mb():
+    """Current resident set size, None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+class StageProfiler:
+    """Wall time, CPU time, memory and row counts per pipeline stage
+
+    A disabled profiler only hands out a throwaway record, so instrumented code
+    costs next to nothing when profiling is off.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = []
+        self.series = []
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Time the enclosed block; set record['rows_out'] inside it"""
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        if not self.enabled:
+            yield record
+            return
+        start, wall_start, cpu_start = time.time(), time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            rss = current_rss_mb()
+            record.update({
+                'start': start,
+                'wall_seconds': round(time.perf_counter() - wall_start, 4),
+                'cpu_seconds': round(time.process_time() - cpu_start, 4),
+                'rss_mb': round(rss, 1) if rss is not None else None,
+                'max_rss_mb': round(max_rss_mb(), 1),
+                'thread': threading.current_thread().name
+            })
+            self.stages.append(record)
+
+    def add_series(self, name, timings):
+        """Record fit/predict durations of one series, measured in whichever process fitted it"""
+        if self.enabled:
+            self.series.append(dict(timings, series=name))
+
+    def to_dict(self):
+        """Stage and per-series records as plain data"""
+        return {'stages': self.stages, 'series': self.series}
+
+    def write_json(self, path=PROFILE_FILE):
+        """Write the records as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+
+    def write_chrome_trace(self, path):
+        """Write the records in Chrome trace format (chrome://tracing, Perfetto)"""
+        main_pid = os.getpid()
+        events = []
+        # Stages run on background threads get their own track so overlaps stay visible
+        tids = {'MainThread': 0}
+        for record in self.stages:
+            thread = record.get('thread', 'MainThread')
+            tids.setdefault(thread, len(tids) + 1)
+            events.append({
+                'name': record['stage'], 'cat': 'stage', 'ph': 'X',
+                'ts': record['start'] * 1e6, 'dur': record['wall_seconds'] * 1e6,
+                'pid': main_pid, 'tid': tids[thread],
+                'args': {key: record[key] for key in ('rows_in', 'rows_out', 'cpu_seconds', 'max_rss_mb')}
+            })
+        for record in self.series:
+            pid = record.get('pid', main_pid)
+            fit_start = record['start']
+            for phase, offset in (('fit', 0), ('predict', record['fit'])):
+                events.append({
+                    'name': f"{phase} {record['series']}", 'cat': phase, 'ph': 'X',
+                    'ts': (fit_start + offset) * 1e6, 'dur': record[phase] * 1e6,
+                    'pid': pid, 'tid': 1
+                })
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def print_summary(self):
+        """Print one line per stage"""
+        for record in self.stages:
+            rows = f"{record['rows_out']:,} rows" if record['rows_out'] is not None else ''
+            print(f"  {record['stage']:<12} {record['wall_seconds']:>8.3f}s wall "
+                  f"{record['cpu_seconds']:>8.3f}s cpu {record['max_rss_mb']:>8.1f} MB peak RSS  {rows}")
+
+def add_profile_arguments(parser):
+    """Add the profiling options: --profile for the stage report and --trace for a Chrome trace"""
+    parser.add_argument('--profile', action='store_true',
+                        help=f"Record per-stage timing and memory in {PROFILE_FILE}")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="Also write a Chrome trace file (implies --profile)")
+
+def profiler_from_args(args):
+    """Profiler enabled by --profile or --trace"""
+    return StageProfiler(enabled=args.profile or bool(args.trace))
+
+def write_profile(profiler, args, path=PROFILE_FILE):
+    """Write the profile (and trace) requested on the command line"""
+    if not profiler.enabled:
+        return
+    profiler.write_json(path)
+    print(f"\nPipeline profile saved to '{path}':")
+    profiler.print_summary()
+    if args.trace:
+        profiler.write_chrome_trace(args.trace)
+        print(f"Chrome trace saved to '{args.trace}'")
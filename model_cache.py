@@ -0,0 +1,181 @@
+import pandas as pd
+import prophet
+from prophet.serialize import model_to_json, model_from_json
+import hashlib
+import json
+import os
+import time
+
+CACHE_DIR = 'models/cache'
+STATE_DIR = 'models/state'
+INDEX_FILE = 'index.json'
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+def fingerprint(forecast_data, params):
+    """Hash the ds/y series together with the model hyperparameters"""
+    series = forecast_data[['ds', 'y']].reset_index(drop=True)
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(series, index=False).values.tobytes())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    digest.update(prophet.__version__.encode())
+    return digest.hexdigest()
+
+def hash_rows(forecast_data, n_rows=None):
+    """Hash the first n_rows of the ds/y series"""
+    series = forecast_data[['ds', 'y']].reset_index(drop=True)
+    if n_rows is not None:
+        series = series.iloc[:n_rows]
+    # Daily sums can differ in the last bits between reads; compare at sub-cent precision
+    series = series.assign(y=series['y'].round(6))
+    return hashlib.sha256(pd.util.hash_pandas_object(series, index=False).values.tobytes()).hexdigest()
+
+def stan_init(model):
+    """Extract fitted parameters of a Prophet model as optimizer starting values"""
+    res = {}
+    for pname in ['k', 'm', 'sigma_obs']:
+        res[pname] = model.params[pname][0][0]
+    for pname in ['delta', 'beta']:
+        res[pname] = model.params[pname][0]
+    return res
+
+def _state_paths(series_key, state_dir):
+    return (os.path.join(state_dir, f'{series_key}.model.json'),
+            os.path.join(state_dir, f'{series_key}.meta.json'))
+
+def load_fit_state(series_key, state_dir=STATE_DIR):
+    """Load the last fitted model and its data metadata for a series"""
+    model_path, meta_path = _state_paths(series_key, state_dir)
+    if not (os.path.exists(model_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    with open(model_path) as f:
+        model = model_from_json(f.read())
+    return model, meta
+
+def save_fit_state(series_key, model, forecast_data, params, state_dir=STATE_DIR):
+    """Remember a fitted model and the data it was fitted on"""
+    os.makedirs(state_dir, exist_ok=True)
+    model_path, meta_path = _state_paths(series_key, state_dir)
+    meta = {
+        'n_rows': len(forecast_data),
+        'last_ds': str(forecast_data['ds'].max()),
+        'rows_hash': hash_rows(forecast_data),
+        'params': json.dumps(params, sort_keys=True, default=str)
+    }
+    with open(model_path + '.tmp', 'w') as f:
+        f.write(model_to_json(model))
+    os.replace(model_path + '.tmp', model_path)
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+def detect_change(forecast_data, meta, params):
+    """Classify new data against the last fit as unchanged, append or rewritten"""
+    if meta is None or meta['params'] != json.dumps(params, sort_keys=True, default=str):
+        return 'rewritten'
+    n_rows = meta['n_rows']
+    if len(forecast_data) < n_rows or hash_rows(forecast_data, n_rows) != meta['rows_hash']:
+        return 'rewritten'
+    return 'unchanged' if len(forecast_data) == n_rows else 'append'
+
+def fit_incremental(model_factory, forecast_data, series_key, params, state_dir=STATE_DIR):
+    """Fit a new model, warm-starting from the previous fit when only new days were appended"""
+    forecast_data = forecast_data.sort_values('ds').reset_index(drop=True)
+    previous, meta = load_fit_state(series_key, state_dir)
+    change = detect_change(forecast_data, meta, params)
+
+    if change == 'unchanged':
+        return previous, change
+
+    model = model_factory()
+    if change == 'append':
+        try:
+            model.fit(forecast_data[['ds', 'y']], init=stan_init(previous))
+        except Exception:
+            # Parameter shapes can differ (e.g. changepoints on a short history); refit cold
+            model = model_factory()
+            change = 'rewritten'
+
+    if change == 'rewritten':
+        model.fit(forecast_data[['ds', 'y']])
+
+    save_fit_state(series_key, model, forecast_data, params, state_dir)
+    return model, change
+
+class ModelCache:
+    """On-disk cache of fitted Prophet models with LRU eviction"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return {'entries': {}, 'hits': 0, 'misses': 0}
+        with open(self.index_path) as f:
+            return json.load(f)
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _model_path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def get(self, key):
+        """Return the cached model for key, or None on a miss"""
+        path = self._model_path(key)
+        entry = self.index['entries'].get(key)
+        if entry is None or not os.path.exists(path):
+            self.index['entries'].pop(key, None)
+            self.misses += 1
+            self.index['misses'] += 1
+            self._save_index()
+            return None
+
+        with open(path) as f:
+            model = model_from_json(f.read())
+        entry['last_used'] = time.time()
+        self.hits += 1
+        self.index['hits'] += 1
+        self._save_index()
+        return model
+
+    def put(self, key, model):
+        """Serialize a fitted model and evict least recently used entries over the size limit"""
+        path = self._model_path(key)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(model_to_json(model))
+        os.replace(tmp_path, path)
+        self.index['entries'][key] = {'last_used': time.time(), 'size': os.path.getsize(path)}
+        self._evict()
+        self._save_index()
+
+    def _evict(self):
+        entries = self.index['entries']
+        total = sum(entry['size'] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]['last_used']):
+            if total <= self.max_bytes or len(entries) <= 1:
+                break
+            total -= entries.pop(key)['size']
+            if os.path.exists(self._model_path(key)):
+                os.remove(self._model_path(key))
+
+    def stats(self):
+        """Hit/miss counters for this session and across all runs"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'total_hits': self.index['hits'],
+            'total_misses': self.index['misses'],
+            'entries': len(self.index['entries']),
+            'bytes': sum(entry['size'] for entry in self.index['entries'].values())
+        }
@@ -0,0 +1,206 @@
+from prophet import Prophet
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from model_cache import STATE_DIR, fit_incremental
+from sales_cube import dimension_daily
+import fourier_engine
+import intermittent_engine
+from fast_predict import predict_forecast
+import multiprocessing
+import warnings
+import json
+import os
+import time
+
+warnings.filterwarnings('ignore')
+
+FIT_TIMES_FILE = 'fit_times.json'
+
+# Engines that forecast all of their tasks together in-process, keyed by task['engine']
+BATCH_ENGINES = {
+    'fourier': fourier_engine.forecast_tasks,
+    'intermittent': intermittent_engine.forecast_tasks
+}
+
+DEFAULT_PROPHET_PARAMS = {
+    'yearly_seasonality': True,
+    'weekly_seasonality': True,
+    'daily_seasonality': False,
+    'seasonality_mode': 'multiplicative'
+}
+
+# Total model of the dashboard script; forecast_monitor.py refits it with the same settings
+TOTAL_PROPHET_PARAMS = dict(DEFAULT_PROPHET_PARAMS, changepoint_prior_scale=0.05)
+TOTAL_COUNTRY_HOLIDAYS = 'US'
+
+def series_filename(dimension, value):
+    """Build the forecast CSV name for one dimension value"""
+    slug = str(value).lower().replace(" ", "_")
+    if dimension == 'Category':
+        return f'forecast_{slug}.csv'
+    return f'forecast_{dimension.lower()}_{slug}.csv'
+
+def build_series_tasks(cube, dimensions=('Category',), min_days=30, params=None):
+    """Roll the aggregation cube up into one daily series per dimension value as fit tasks"""
+    dim_daily = {dimension: dimension_daily(cube, dimension) for dimension in dimensions}
+    return tasks_from_daily(dim_daily, min_days, params)
+
+def tasks_from_daily(dim_daily, min_days=30, params=None):
+    """Build fit tasks from daily Sales sums indexed by (dimension value, Order Date)"""
+    tasks = []
+    for dimension, daily in dim_daily.items():
+        for value, series in daily.groupby(level=0):
+            series = series.droplevel(0).reset_index()
+            series.columns = ['ds', 'y']
+            if len(series) > min_days:  # Only forecast if we have sufficient data
+                tasks.append({
+                    'name': series_filename(dimension, value),
+                    'label': value,
+                    'level': dimension,
+                    'series': series,
+                    'params': dict(params or DEFAULT_PROPHET_PARAMS)
+                })
+    return tasks
+
+def process_pool(max_workers):
+    """Process pool whose workers are not forked from this process
+
+    With --concurrent, output threads can be running when a pool starts its workers, and a
+    child forked then may inherit a lock one of them holds. Workers fork from a forkserver
+    instead, which has Prophet preloaded so each one still starts quickly.
+    """
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=max_workers)
+    context = multiprocessing.get_context('forkserver')
+    # The main script is preloaded too, otherwise every worker re-imports it and Prophet with it
+    context.set_forkserver_preload(['__main__', 'parallel_forecast'])
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+def build_model(task):
+    """Create an unfitted Prophet model configured for a task"""
+    model = Prophet(**task['params'])
+    if task.get('country_holidays'):
+        model.add_country_holidays(country_name=task['country_holidays'])
+    return model
+
+def fit_series(task, periods=90, state_dir=STATE_DIR, predict_kwargs=None):
+    """Fit one Prophet model and return its forecast with the fit duration and phase timings"""
+    started_at = time.time()
+    start = time.perf_counter()
+    if state_dir:
+        # Warm-start from this series' previous fit when only new days were appended
+        state_params = dict(task['params'], country_holidays=task.get('country_holidays'))
+        series_key = os.path.splitext(task['name'])[0]
+        model, change = fit_incremental(lambda: build_model(task), task['series'],
+                                        series_key, state_params, state_dir)
+        if change == 'append':
+            print(f"{task['label']}: new days appended, warm-started from previous fit")
+    else:
+        model = build_model(task)
+        model.fit(task['series'][['ds', 'y']])
+    fitted = time.perf_counter()
+    forecast = predict_forecast(model, periods, **(predict_kwargs or {}))
+    elapsed = time.perf_counter() - start
+    timings = {'start': started_at, 'fit': fitted - start, 'predict': elapsed - (fitted - start),
+               'pid': os.getpid()}
+    return task['name'], forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']], elapsed, timings
+
+def load_fit_times(path=FIT_TIMES_FILE):
+    """Load fit durations recorded by previous runs"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_fit_times(fit_times, path=FIT_TIMES_FILE):
+    """Persist fit durations so the next run can schedule slowest-first"""
+    with open(path, 'w') as f:
+        json.dump(fit_times, f, indent=2)
+
+def order_slowest_first(tasks, fit_times):
+    """Sort tasks by recorded fit time, unseen series first and longest history next"""
+    return sorted(
+        tasks,
+        key=lambda task: (fit_times.get(task['name'], float('inf')), len(task['series'])),
+        reverse=True
+    )
+
+def run_forecasts(tasks, max_workers=None, periods=90, fit_times_path=FIT_TIMES_FILE,
+                  state_dir=STATE_DIR, predict_kwargs=None, on_result=None):
+    """Fit every task on a process pool and return forecasts keyed by task name
+
+    on_result(name, forecast) is called in this process as each forecast arrives, so callers
+    can start writing finished series while the others are still fitting.
+    """
+    fit_times = load_fit_times(fit_times_path)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    forecasts = {}
+    durations = {}
+    timings = {}
+
+    # Tasks on a batched engine are solved together in-process
+    for engine, forecast_batch in BATCH_ENGINES.items():
+        batch = [task for task in tasks if task.get('engine') == engine]
+        if not batch:
+            continue
+        start = time.perf_counter()
+        include_history = (predict_kwargs or {}).get('include_history', True)
+        batch_forecasts = forecast_batch(batch, periods, include_history=include_history)
+        forecasts.update(batch_forecasts)
+        if on_result:
+            for name, forecast in batch_forecasts.items():
+                on_result(name, forecast)
+        print(f"{engine.capitalize()} engine: {len(batch)} series in {time.perf_counter() - start:.2f}s")
+    tasks = order_slowest_first([task for task in tasks if task.get('engine') not in BATCH_ENGINES],
+                                fit_times)
+
+    start = time.perf_counter()
+
+    if max_workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            name, forecast, elapsed, timings[name] = fit_series(task, periods, state_dir, predict_kwargs)
+            forecasts[name] = forecast
+            durations[name] = elapsed
+            if on_result:
+                on_result(name, forecast)
+    else:
+        with process_pool(min(max_workers, len(tasks))) as pool:
+            futures = [pool.submit(fit_series, task, periods, state_dir, predict_kwargs)
+                       for task in tasks]
+            for future in as_completed(futures):
+                name, forecast, elapsed, series_timings = future.result()
+                timings[name] = series_timings
+                forecasts[name] = forecast
+                durations[name] = elapsed
+                if on_result:
+                    on_result(name, forecast)
+
+    wall_time = time.perf_counter() - start
+    fit_times.update(durations)
+    save_fit_times(fit_times, fit_times_path)
+
+    serial_time = sum(durations.values())
+    speedup = serial_time / wall_time if serial_time > 0 else 1.0
+    print(f"Fitted {len(tasks)} Prophet series with {max_workers} worker(s) in {wall_time:.1f}s "
+          f"(sum of fit times {serial_time:.1f}s, speedup {speedup:.2f}x)")
+
+    return forecasts, {'wall_time': wall_time, 'serial_time': serial_time,
+                       'speedup': speedup, 'workers': max_workers, 'series_timings': timings}
+
+def compare_with_serial(tasks, max_workers=None, periods=90, fit_times_path=FIT_TIMES_FILE,
+                        predict_kwargs=None):
+    """Run the tasks serially and in parallel and report the measured wall-clock speedup"""
+    # Both runs fit cold so the second one is not shortcut by warm-start state from the first
+    print("Running serial baseline...")
+    _, serial_stats = run_forecasts(tasks, max_workers=1, periods=periods,
+                                    fit_times_path=fit_times_path, state_dir=None,
+                                    predict_kwargs=predict_kwargs)
+    print("Running parallel fits...")
+    forecasts, parallel_stats = run_forecasts(tasks, max_workers=max_workers, periods=periods,
+                                              fit_times_path=fit_times_path, state_dir=None,
+                                              predict_kwargs=predict_kwargs)
+    measured = serial_stats['wall_time'] / parallel_stats['wall_time']
+    print(f"Measured speedup vs serial path: {measured:.2f}x "
+          f"({serial_stats['wall_time']:.1f}s -> {parallel_stats['wall_time']:.1f}s)")
+    parallel_stats['measured_speedup'] = measured
+    return forecasts, parallel_stats
@@ -0,0 +1,248 @@
+import pandas as pd
+import argparse
+import hashlib
+import json
+import sys
+import os
+from chart_pyramid import INDEX_FILE, LEVELS, PYRAMID_DIR
+from chart_renderer import CHARTS, print_report, render_charts
+from data_loader import load_sales
+from sales_cube import CUBE_COLUMNS, build_cube, daily_from_cube, kpis_from_cube
+from tuning import tuned_params
+import sales_forecasting_script as pipeline
+
+STATE_DIR = '.pipeline'
+STATE_FILE = os.path.join(STATE_DIR, 'state.json')
+WORK_DIR = os.path.join(STATE_DIR, 'work')
+SOURCE_FILE = 'data/superstore_sales.csv'
+CUBE_FILE = os.path.join(WORK_DIR, 'cube.pkl')
+DAILY_FILE = os.path.join(WORK_DIR, 'daily_sales.csv')
+
+def file_hash(path, memo=None):
+    """SHA-256 of a file's content, reusing a memoised hash while its size and mtime are unchanged"""
+    stat = os.stat(path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    if memo is not None and memo.get(path, {}).get('signature') == signature:
+        return memo[path]['sha256']
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    if memo is not None:
+        memo[path] = {'signature': signature, 'sha256': digest.hexdigest()}
+    return digest.hexdigest()
+
+def load_state(path=STATE_FILE):
+    """Stage keys and output hashes recorded by the last run"""
+    if not os.path.exists(path):
+        return {'stages': {}, 'files': {}}
+    with open(path) as f:
+        return json.load(f)
+
+def save_state(state, path=STATE_FILE):
+    """Persist the run state atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def stage_key(stage, memo):
+    """Content hash of everything a stage depends on: input files, code files and parameters"""
+    digest = hashlib.sha256()
+    for path in sorted(stage['inputs'] + stage.get('code', [])):
+        digest.update(path.encode())
+        digest.update(file_hash(path, memo).encode() if os.path.exists(path) else b'missing')
+    digest.update(json.dumps(stage.get('params', {}), sort_keys=True).encode())
+    return digest.hexdigest()
+
+def stage_status(stage, state, pending_outputs=()):
+    """Why a stage has to run, or None when its recorded outputs are still valid"""
+    memo = state['files']
+    waiting = [path for path in stage['inputs'] if path in pending_outputs]
+    if waiting:
+        return f"upstream output pending: {', '.join(waiting)}"
+    missing = [path for path in stage['inputs'] + stage.get('code', []) if not os.path.exists(path)]
+    if missing:
+        return f"missing input: {', '.join(missing)}"
+
+    record = state['stages'].get(stage['name'])
+    if record is None:
+        return "never run"
+    if record['key'] != stage_key(stage, memo):
+        changed = [path for path in stage['inputs'] + stage.get('code', [])
+                   if record['inputs'].get(path) != file_hash(path, memo)]
+        return f"changed: {', '.join(changed)}" if changed else "parameters changed"
+    for path in stage['outputs']:
+        if not os.path.exists(path):
+            return f"output missing: {path}"
+        if file_hash(path, memo) != record['outputs'].get(path):
+            return f"output modified: {path}"
+    return None
+
+def run_stages(stages, state, dry_run=False, force=()):
+    """Run the stages whose inputs changed since their last run, in declaration order"""
+    pending_outputs = set()
+    ran, failed = [], []
+    for stage in stages:
+        blocked = [path for path in stage['inputs'] if path in pending_outputs]
+        if blocked and not dry_run:
+            print(f"  fail  {stage['name']:<14} upstream stage failed")
+            pending_outputs.update(stage['outputs'])
+            failed.append(stage['name'])
+            continue
+        reason = "forced" if stage['name'] in force else stage_status(stage, state, pending_outputs)
+        if reason is None:
+            print(f"  skip  {stage['name']:<14} up to date")
+            continue
+        print(f"  run   {stage['name']:<14} {reason}")
+        if dry_run:
+            # Downstream stages cannot be checked until this one has produced its outputs
+            pending_outputs.update(stage['outputs'])
+            continue
+
+        try:
+            stage['run']()
+        except Exception as exc:
+            # Independent stages still run; this one is retried next time
+            print(f"  fail  {stage['name']:<14} {exc}")
+            pending_outputs.update(stage['outputs'])
+            failed.append(stage['name'])
+            continue
+        memo = state['files']
+        state['stages'][stage['name']] = {
+            'key': stage_key(stage, memo),
+            'inputs': {path: file_hash(path, memo) for path in stage['inputs'] + stage.get('code', [])},
+            'outputs': {path: file_hash(path, memo) for path in stage['outputs']}
+        }
+        save_state(state)
+        ran.append(stage['name'])
+    return ran, failed
+
+def _prepare():
+    os.makedirs(WORK_DIR, exist_ok=True)
+    cube = build_cube(load_sales(SOURCE_FILE, columns=CUBE_COLUMNS))
+    cube.to_pickle(CUBE_FILE)
+    daily = daily_from_cube(cube).rename(columns={'Order Date': 'ds', 'Sales': 'y'})
+    daily.sort_values('ds').to_csv(DAILY_FILE, index=False)
+
+def _forecast():
+    forecast_data = pd.read_csv(DAILY_FILE, parse_dates=['ds'])
+    _, forecast = pipeline.train_prophet_model(forecast_data,
+                                               params=tuned_params('total', pipeline.PROPHET_PARAMS))
+    pipeline.save_forecast_data(forecast, forecast_data)
+
+def _analysis():
+    pipeline.create_analysis_files(pd.read_pickle(CUBE_FILE))
+
+def _kpis():
+    forecast = pd.read_csv('forecast/daily_forecast.csv', parse_dates=['ds'])
+    forecast_data = pd.read_csv(DAILY_FILE, parse_dates=['ds'])
+    pipeline.save_kpis(kpis_from_cube(pd.read_pickle(CUBE_FILE)), forecast, forecast_data)
+
+def _pyramid():
+    forecast = pd.read_csv('forecast/daily_forecast.csv', parse_dates=['ds'])
+    pipeline.save_chart_pyramid(forecast, pd.read_csv(DAILY_FILE, parse_dates=['ds']))
+
+def _charts():
+    reports = render_charts()
+    print_report(reports)
+    failed = [report['name'] for report in reports if report['status'] == 'failed']
+    if failed:
+        raise RuntimeError(f"chart(s) failed: {', '.join(failed)}")
+
+def build_stages():
+    """The forecasting pipeline as stages with declared inputs, outputs and code"""
+    stages = [
+        {
+            'name': 'prepare',
+            'inputs': [SOURCE_FILE],
+            'code': ['data_loader.py', 'sales_cube.py', 'pipeline_runner.py'],
+            'outputs': [CUBE_FILE, DAILY_FILE],
+            'run': _prepare
+        },
+        {
+            'name': 'forecast',
+            'inputs': [DAILY_FILE],
+            'code': ['sales_forecasting_script.py', 'fast_predict.py', 'model_cache.py'],
+            # Settings from best_params.json are part of the key, so a new tuning result refits
+            'params': tuned_params('total', pipeline.PROPHET_PARAMS),
+            'outputs': ['forecast/daily_forecast.csv', 'forecast/monthly_forecast.csv'],
+            'run': _forecast
+        },
+        {
+            'name': 'analysis',
+            'inputs': [CUBE_FILE],
+            'code': ['sales_forecasting_script.py', 'sales_cube.py'],
+            'outputs': ['forecast/category_analysis.csv', 'forecast/regional_analysis.csv'],
+            'run': _analysis
+        },
+        {
+            'name': 'kpis',
+            'inputs': [CUBE_FILE, DAILY_FILE, 'forecast/daily_forecast.csv'],
+            'code': ['sales_forecasting_script.py', 'sales_cube.py'],
+            'outputs': ['forecast/kpis.json'],
+            'run': _kpis
+        },
+        {
+            'name': 'pyramid',
+            'inputs': [DAILY_FILE, 'forecast/daily_forecast.csv'],
+            'code': ['sales_forecasting_script.py', 'chart_pyramid.py'],
+            'outputs': [os.path.join('forecast', PYRAMID_DIR, name)
+                        for name in [INDEX_FILE] + [f'total.{level}.json.gz' for level in ['overview', *LEVELS]]],
+            'run': _pyramid
+        },
+        {
+            # Unchanged figures inside this stage are skipped by chart_renderer's own hash cache
+            'name': 'charts',
+            'inputs': sorted({os.path.join('forecast', name) for chart in CHARTS.values()
+                              for name in chart['inputs']}),
+            'code': ['chart_renderer.py'],
+            'outputs': [os.path.join('images', chart['image']) for chart in CHARTS.values()],
+            'run': _charts
+        }
+    ]
+    return stages
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Run only the pipeline stages whose inputs changed")
+    parser.add_argument('stages', nargs='*', help="Limit the run to these stages")
+    parser.add_argument('--dry-run', action='store_true', help="Show what would run without running it")
+    parser.add_argument('--force', nargs='+', default=[], metavar='STAGE',
+                        help="Run these stages even if they are up to date")
+    parser.add_argument('--list', action='store_true', help="List stages with their inputs and outputs")
+    return parser.parse_args()
+
+def main():
+    """Main execution function"""
+    args = parse_args()
+    stages = build_stages()
+    names = [stage['name'] for stage in stages]
+    unknown = [name for name in args.stages + args.force if name not in names]
+    if unknown:
+        sys.exit(f"Unknown stage(s): {', '.join(unknown)} (available: {', '.join(names)})")
+
+    if args.list:
+        for stage in stages:
+            print(f"{stage['name']}:")
+            print(f"  inputs:  {', '.join(stage['inputs'] + stage.get('code', []))}")
+            print(f"  outputs: {', '.join(stage['outputs'])}")
+        return
+
+    if args.stages:
+        stages = [stage for stage in stages if stage['name'] in args.stages]
+    state = load_state()
+    if args.dry_run:
+        print("Dry run, nothing will be executed:")
+        run_stages(stages, state, dry_run=True, force=args.force)
+        return
+
+    pipeline.create_folders()
+    print("Running pipeline:")
+    ran, failed = run_stages(stages, state, force=args.force)
+    print(f"\n{len(ran)} of {len(stages)} stage(s) executed")
+    if failed:
+        sys.exit(f"Failed stage(s): {', '.join(failed)}")
+
+if __name__ == "__main__":
+    main()
@@ -3,172 +3,340 @@ import pandas as pd
 import numpy as np
 from prophet import Prophet
 import matplotlib.pyplot as plt
+import argparse
+import calendar
+import json
+import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
-print("Loading Sample Superstore dataset...")
-
-# Load the dataset
-df = pd.read_csv('sample_superstore.csv')
-df['Order Date'] = pd.to_datetime(df['Order Date'])
-
-print(f"Dataset loaded: {len(df)} records from {df['Order Date'].min()} to {df['Order Date'].max()}")
-
-# Aggregate daily sales
-daily_sales = df.groupby('Order Date').agg({
-    'Sales': 'sum',
-    'Profit': 'sum',
-    'Quantity': 'sum'
-}).reset_index()
-
-# Prepare data for Prophet (requires 'ds' and 'y' columns)
-prophet_data = daily_sales[['Order Date', 'Sales']].copy()
-prophet_data.columns = ['ds', 'y']
-prophet_data = prophet_data.sort_values('ds')
-
-print(f"Daily sales data prepared: {len(prophet_data)} days")
-print(f"Average daily sales: ${prophet_data['y'].mean():.2f}")
-
-# Initialize and train Prophet model
-print("Training Prophet forecasting model...")
-model = Prophet(
-    yearly_seasonality=True,
-    weekly_seasonality=True,
-    daily_seasonality=False,
-    seasonality_mode='multiplicative',
-    changepoint_prior_scale=0.05
-)
-
-# Add US holidays
-model.add_country_holidays(country_name='US')
-
-# Fit the model
-model.fit(prophet_data)
-
-# Create future dataframe for next 90 days
-future = model.make_future_dataframe(periods=90, freq='D')
-print(f"Generating forecasts for next 90 days...")
-
-# Generate forecasts
-forecast = model.predict(future)
-
-# Calculate model accuracy metrics
-historical_forecast = forecast[forecast['ds'] <= prophet_data['ds'].max()].copy()
-historical_actual = prophet_data.copy()
-
-# Merge for comparison
-comparison = historical_actual.merge(historical_forecast[['ds', 'yhat']], on='ds')
-comparison['error'] = comparison['y'] - comparison['yhat']
-comparison['abs_error'] = abs(comparison['error'])
-comparison['pct_error'] = abs(comparison['error']) / comparison['y'] * 100
-
-mae = comparison['abs_error'].mean()
-mape = comparison['pct_error'].mean()
-
-print(f"Model Accuracy Metrics:")
-print(f"  Mean Absolute Error (MAE): ${mae:.2f}")
-print(f"  Mean Absolute Percentage Error (MAPE): {mape:.1f}%")
-
-# Prepare forecast data for export
-forecast_export = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-forecast_export['ds'] = forecast_export['ds'].dt.strftime('%Y-%m-%d')
-forecast_export['yhat'] = forecast_export['yhat'].round(2)
-forecast_export['yhat_lower'] = forecast_export['yhat_lower'].round(2)
-forecast_export['yhat_upper'] = forecast_export['yhat_upper'].round(2)
-
-# Add actual sales where available
-forecast_export = forecast_export.merge(
-    prophet_data.rename(columns={'ds': 'ds_temp', 'y': 'actual_sales'}),
-    left_on='ds', right_on='ds_temp', how='left'
-).drop('ds_temp', axis=1)
-
-# Save full forecast data to CSV
-forecast_export.to_csv('forecast_data.csv', index=False)
-print("Full forecast data saved to 'forecast_data.csv'")
-
-# Generate monthly forecasts
-forecast['month'] = forecast['ds'].dt.month
-forecast['year'] = forecast['ds'].dt.year
-forecast['month_year'] = forecast['ds'].dt.to_period('M')
-
-# Get future dates only for monthly summary
-future_forecast = forecast[forecast['ds'] > prophet_data['ds'].max()].copy()
-
-monthly_forecast = future_forecast.groupby(['year', 'month']).agg({
-    'yhat': 'mean',
-    'yhat_lower': 'mean', 
-    'yhat_upper': 'mean'
-}).reset_index()
-
-# Add month names
-import calendar
-monthly_forecast['month_name'] = monthly_forecast['month'].apply(lambda x: calendar.month_abbr[x])
-monthly_forecast['yhat'] = monthly_forecast['yhat'].round(2)
-monthly_forecast['yhat_lower'] = monthly_forecast['yhat_lower'].round(2)
-monthly_forecast['yhat_upper'] = monthly_forecast['yhat_upper'].round(2)
-
-# Save monthly forecast
-monthly_forecast.to_csv('monthly_forecast.csv', index=False)
-print("Monthly forecast data saved to 'monthly_forecast.csv'")
-
-# Create category-wise forecasts
-print("Generating category-wise forecasts...")
-category_forecasts = {}
-
-for category in df['Category'].unique():
-    cat_data = df[df['Category'] == category].copy()
-    cat_daily = cat_data.groupby('Order Date')['Sales'].sum().reset_index()
-    cat_daily.columns = ['ds', 'y']
-
-    if len(cat_daily) > 30:  # Only forecast if we have sufficient data
-        cat_model = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=True,
-            daily_seasonality=False,
-            seasonality_mode='multiplicative'
-        )
-        cat_model.fit(cat_daily)
-        cat_future = cat_model.make_future_dataframe(periods=90, freq='D')
-        cat_forecast = cat_model.predict(cat_future)
-
-        category_forecasts[category] = cat_forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-
-# Save category forecasts
-for category, cat_forecast in category_forecasts.items():
-    filename = f'forecast_{category.lower().replace(" ", "_")}.csv'
-    cat_forecast['ds'] = cat_forecast['ds'].dt.strftime('%Y-%m-%d')
-    cat_forecast.to_csv(filename, index=False)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from background_tasks import BackgroundTasks, add_concurrency_arguments
+from backtest import horizon_buckets, horizon_metrics, overall_metrics, run_backtest
+from chart_pyramid import PYRAMID_DIR, write_pyramid
+from data_loader import CHUNK_SIZE, compact_frame, load_sales
+from fast_predict import add_predict_arguments, predict_options
+from forecast_io import add_output_arguments, save_table
+from instrumentation import PROFILE_FILE, add_profile_arguments, profiler_from_args, write_profile
+from hierarchy import (METHODS, bottom_history, build_hierarchy_tasks, coherence_error,
+                       fit_levels_for, node_filename, reconcile, summing_matrix, to_long)
+from model_cache import STATE_DIR
+from parallel_forecast import (TOTAL_COUNTRY_HOLIDAYS, TOTAL_PROPHET_PARAMS, build_series_tasks,
+                               compare_with_serial, run_forecasts)
+from sales_cube import (CUBE_COLUMNS, CUBE_DIMENSIONS, build_cube, build_cube_from_csv,
+                        daily_from_cube, kpis_from_cube)
+from tuning import add_tuning_arguments, load_best_params, save_best_params, tune_tasks, tuned_params
+
+def export_forecasts(forecast, prophet_data, series_outputs, binary_format=None, written=()):
+    """Write the total, monthly and per-dimension forecasts and the chart pyramid
+
+    Files in `written` were already saved as their fits finished. Returns the predicted 90-day
+    sales and the per-dimension label -> filename mapping.
+    """
+    # Prepare forecast data for export
+    forecast_export = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
+    forecast_export['yhat'] = forecast_export['yhat'].round(2)
+    forecast_export['yhat_lower'] = forecast_export['yhat_lower'].round(2)
+    forecast_export['yhat_upper'] = forecast_export['yhat_upper'].round(2)
+
+    # Add actual sales where available (joined on the native timestamps)
+    actual_sales = prophet_data.rename(columns={'y': 'actual_sales'})
+    forecast_export = forecast_export.merge(actual_sales, on='ds', how='left')
+
+    # Save full forecast data to CSV
+    save_table(forecast_export, 'forecast_data.csv', binary_format)
+    print("Full forecast data saved to 'forecast_data.csv'")
+
+    # Generate monthly forecasts
+    forecast['month'] = forecast['ds'].dt.month
+    forecast['year'] = forecast['ds'].dt.year
+    forecast['month_year'] = forecast['ds'].dt.to_period('M')
+
+    # Get future dates only for monthly summary
+    future_forecast = forecast[forecast['ds'] > prophet_data['ds'].max()].copy()
+
+    monthly_forecast = future_forecast.groupby(['year', 'month']).agg({
+        'yhat': 'mean',
+        'yhat_lower': 'mean',
+        'yhat_upper': 'mean'
+    }).reset_index()
+
+    # Add month names
+    monthly_forecast['month_name'] = monthly_forecast['month'].apply(lambda x: calendar.month_abbr[x])
+    monthly_forecast['yhat'] = monthly_forecast['yhat'].round(2)
+    monthly_forecast['yhat_lower'] = monthly_forecast['yhat_lower'].round(2)
+    monthly_forecast['yhat_upper'] = monthly_forecast['yhat_upper'].round(2)
+
+    # Save monthly forecast
+    save_table(monthly_forecast, 'monthly_forecast.csv', binary_format)
+    print("Monthly forecast data saved to 'monthly_forecast.csv'")
+
+    # Save category forecasts
+    category_forecasts = {}
+    for label, filename, cat_forecast in series_outputs:
+        if filename not in written:
+            save_series(cat_forecast, filename, binary_format)
+        category_forecasts[label] = filename
+
+    # Multi-resolution chart data for the total and every per-dimension series
+    pyramid_series = {'total': forecast_export.rename(columns={'actual_sales': 'actual'})}
+    for label, filename, cat_forecast in series_outputs:
+        pyramid_series[os.path.splitext(filename)[0][len('forecast_'):]] = cat_forecast
+    write_pyramid(pyramid_series, '.', history_end=prophet_data['ds'].max())
+    print(f"Chart pyramid saved to '{PYRAMID_DIR}/'")
+
+    return future_forecast['yhat'].sum(), category_forecasts
+
+def save_series(cat_forecast, filename, binary_format=None):
+    """Save one per-dimension forecast"""
+    save_table(cat_forecast, filename, binary_format)
     print(f"Category forecast saved: {filename}")
 
-# Generate summary statistics
-summary_stats = {
-    'total_historical_days': len(prophet_data),
-    'forecast_days': 90,
-    'avg_daily_sales': prophet_data['y'].mean(),
-    'total_historical_sales': prophet_data['y'].sum(),
-    'predicted_90_day_sales': future_forecast['yhat'].sum(),
-    'model_mae': mae,
-    'model_mape': mape,
-    'categories_forecasted': list(category_forecasts.keys())
-}
-
-# Save summary
-import json
-with open('forecast_summary.json', 'w') as f:
-    json.dump(summary_stats, f, indent=2, default=str)
-
-print("\nForecast Summary:")
-print(f"  Historical period: {len(prophet_data)} days")
-print(f"  Average daily sales: ${summary_stats['avg_daily_sales']:.2f}")
-print(f"  Total historical sales: ${summary_stats['total_historical_sales']:,.2f}")
-print(f"  Predicted 90-day sales: ${summary_stats['predicted_90_day_sales']:,.2f}")
-print(f"  Categories forecasted: {len(category_forecasts)}")
-
-print("\nAll forecast files generated successfully!")
-print("Files created:")
-print("  - forecast_data.csv (daily forecasts)")
-print("  - monthly_forecast.csv (monthly averages)")
-for category in category_forecasts.keys():
-    print(f"  - forecast_{category.lower().replace(' ', '_')}.csv")
-print("  - forecast_summary.json")
-
+def series_writer(background, written, binary_format=None):
+    """run_forecasts callback that saves each per-dimension forecast on a background thread"""
+    def on_result(name, forecast):
+        if name != 'total':
+            background.submit('write_series', save_series, forecast, name, binary_format,
+                              rows_in=len(forecast))
+            written.add(name)
+    return on_result
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Sample Superstore forecasting")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Process pool size for model fitting (default: CPU count, 1 = serial)")
+    parser.add_argument('--dimensions', nargs='+', default=['Category'], choices=CUBE_DIMENSIONS[1:],
+                        help="Columns to forecast per value, e.g. Category Region Segment")
+    parser.add_argument('--compare-serial', action='store_true',
+                        help="Also run the serial path and report the measured speedup")
+    parser.add_argument('--cold-start', action='store_true',
+                        help="Fit from scratch even when only new days were appended")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Aggregate the CSV in bounded chunks instead of loading it whole")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE,
+                        help="Rows per chunk in streaming mode")
+    parser.add_argument('--compact', action='store_true',
+                        help="Hold the transaction table as categoricals and downcast numbers")
+    parser.add_argument('--cutoffs', type=int, default=4,
+                        help="Number of rolling-origin backtest cutoffs")
+    parser.add_argument('--horizon', type=int, default=90,
+                        help="Days forecast after each backtest cutoff")
+    parser.add_argument('--stride', type=int, default=30,
+                        help="Days between backtest cutoffs")
+    parser.add_argument('--backtest-all', action='store_true',
+                        help="Backtest every per-dimension series, not just the total")
+    parser.add_argument('--hierarchy', choices=METHODS,
+                        help="Fit only some levels of the Total/dimension hierarchy and reconcile the rest")
+    parser.add_argument('--hierarchy-levels', nargs='+', default=['Category', 'Region'],
+                        choices=CUBE_DIMENSIONS[1:], help="Dimensions forming the hierarchy")
+    parser.add_argument('--middle-level', choices=CUBE_DIMENSIONS[1:],
+                        help="Level fitted by the middle_out method (default: first hierarchy level)")
+    parser.add_argument('--fourier-levels', nargs='+', default=[],
+                        choices=CUBE_DIMENSIONS[1:] + ['bottom'],
+                        help="Levels forecast with the batched Fourier engine instead of Prophet "
+                             "(the total always uses Prophet)")
+    parser.add_argument('--intermittent-levels', nargs='+', default=[],
+                        choices=CUBE_DIMENSIONS[1:] + ['bottom'],
+                        help="Sparse levels forecast with the batched TSB intermittent-demand engine")
+    add_predict_arguments(parser)
+    add_profile_arguments(parser)
+    add_output_arguments(parser)
+    add_concurrency_arguments(parser)
+    add_tuning_arguments(parser)
+    args = parser.parse_args()
+    if args.horizon_only and args.hierarchy == 'mint':
+        parser.error("--hierarchy mint needs in-sample fits; drop --horizon-only")
+    if args.middle_level and args.middle_level not in args.hierarchy_levels:
+        parser.error(f"--middle-level {args.middle_level} is not one of --hierarchy-levels "
+                     f"({' '.join(args.hierarchy_levels)})")
+    overlap = sorted(set(args.fourier_levels) & set(args.intermittent_levels))
+    if overlap:
+        parser.error(f"{' '.join(overlap)} given in both --fourier-levels and --intermittent-levels; "
+                     "pick one engine per level")
+    return args
+
+def main():
+    """Main execution function"""
+    args = parse_args()
+    profiler = profiler_from_args(args)
+
+    # One pass over the raw rows builds the cube every table below is derived from
+    with profiler.stage('load_aggregate') as stage:
+        if args.streaming:
+            print(f"Streaming Sample Superstore dataset in chunks of {args.chunksize:,} rows...")
+            cube = build_cube_from_csv('sample_superstore.csv', args.chunksize)
+        else:
+            print("Loading Sample Superstore dataset...")
+            df = load_sales('sample_superstore.csv', columns=CUBE_COLUMNS)
+            if args.compact:
+                print("Compacting transaction table:")
+                df = compact_frame(df, CUBE_COLUMNS, report=True)
+            cube = build_cube(df)
+        stage['rows_in'] = int(cube['Sales_count'].sum())
+        stage['rows_out'] = len(cube)
+
+    with profiler.stage('rollup', rows_in=len(cube)) as stage:
+        kpis = kpis_from_cube(cube)
+        daily_sales = daily_from_cube(cube)
+        category_tasks = build_series_tasks(cube, dimensions=args.dimensions)
+        stage['rows_out'] = len(category_tasks)
+
+    print(f"Dataset loaded: {kpis['transactions']} records from {daily_sales['Order Date'].min()} to {daily_sales['Order Date'].max()}")
+
+    # Prepare data for Prophet (requires 'ds' and 'y' columns)
+    prophet_data = daily_sales[['Order Date', 'Sales']].copy()
+    prophet_data.columns = ['ds', 'y']
+    prophet_data = prophet_data.sort_values('ds')
+
+    print(f"Daily sales data prepared: {len(prophet_data)} days")
+    print(f"Average daily sales: ${kpis['avg_daily_sales']:.2f}")
+
+    # The total model (with US holidays) and every per-dimension model are fitted together
+    # on one process pool, each worker receiving only its own pre-aggregated daily series
+    print("Training Prophet forecasting models...")
+    total_task = {
+        'name': 'total',
+        'label': 'Total',
+        'series': prophet_data,
+        'params': dict(TOTAL_PROPHET_PARAMS),
+        'country_holidays': TOTAL_COUNTRY_HOLIDAYS
+    }
+    tasks = [total_task] + category_tasks
+
+    # Prophet series pick up the settings of the last tuning run; --tune refreshes them first
+    if args.tune:
+        batch_levels = args.fourier_levels + args.intermittent_levels
+        prophet_tasks = [task for task in tasks if task.get('level') not in batch_levels]
+        print(f"Tuning Prophet settings for {len(prophet_tasks)} series on rolling backtests...")
+        with profiler.stage('tune', rows_in=len(prophet_tasks)):
+            save_best_params(tune_tasks(prophet_tasks, n_cutoffs=args.tune_cutoffs, horizon=args.horizon,
+                                        stride=args.stride, keep=args.tune_keep, max_workers=args.workers))
+    best_params = load_best_params()
+    for task in tasks:
+        task['params'] = tuned_params(task['name'], task['params'], best_params)
+
+    if args.hierarchy:
+        # Fit only the levels the method needs; every other node comes from reconciliation
+        levels = args.hierarchy_levels
+        history = bottom_history(cube, levels)
+        S, nodes = summing_matrix(history.columns, levels)
+        fit_levels = fit_levels_for(args.hierarchy, levels, args.middle_level)
+        tasks = build_hierarchy_tasks(history, S, nodes, fit_levels,
+                                      total_task['params'], total_task['country_holidays'])
+        print(f"Hierarchy of {len(nodes)} nodes: fitting {len(tasks)} at level(s) {', '.join(fit_levels)}")
+
+    for task in tasks:
+        if task.get('level') in args.fourier_levels:
+            task['engine'] = 'fourier'
+        elif task.get('level') in args.intermittent_levels:
+            task['engine'] = 'intermittent'
+
+    # Finished per-dimension forecasts are final unless they are reconciled afterwards,
+    # so with --concurrent each one is written while the remaining fits run
+    background = BackgroundTasks(args.concurrent, profiler, args.io_threads)
+    written = set()
+    on_result = None
+    if args.concurrent and not args.hierarchy:
+        on_result = series_writer(background, written, args.binary_format)
+
+    print(f"Generating forecasts for next 90 days...")
+    with profiler.stage('fit_predict', rows_in=len(tasks)) as stage:
+        if args.compare_serial:
+            forecasts, fit_stats = compare_with_serial(tasks, max_workers=args.workers,
+                                                       predict_kwargs=predict_options(args))
+        else:
+            forecasts, fit_stats = run_forecasts(tasks, max_workers=args.workers,
+                                                 state_dir=None if args.cold_start else STATE_DIR,
+                                                 predict_kwargs=predict_options(args),
+                                                 on_result=on_result)
+        stage['rows_out'] = len(forecasts)
+    for name, timings in fit_stats['series_timings'].items():
+        profiler.add_series(name, timings)
+
+    if args.hierarchy:
+        with profiler.stage('reconcile', rows_in=len(forecasts)) as stage:
+            reconciled = reconcile(history, S, nodes, forecasts, tasks, args.hierarchy, args.middle_level)
+            stage['rows_out'] = len(reconciled)
+        to_long(reconciled, nodes).to_csv('hierarchical_forecast.csv', index=False)
+        print(f"Reconciled {args.hierarchy.replace('_', '-')} forecasts saved to 'hierarchical_forecast.csv' "
+              f"(max coherence error {coherence_error(reconciled, nodes, S):.2e})")
+        forecast = reconciled['Total'].copy()
+        series_outputs = [(node['value'], node_filename(node), reconciled[node['node']])
+                          for _, node in nodes.iterrows() if node_filename(node)]
+    else:
+        forecast = forecasts['total'].copy()
+        series_outputs = [(task['label'], task['name'], forecasts[task['name']]) for task in category_tasks]
+
+    # The exports only need the forecasts; with --concurrent they are written during the backtest
+    export = background.submit('export', export_forecasts, forecast, prophet_data, series_outputs,
+                               args.binary_format, written,
+                               rows_in=len(forecast) + sum(len(frame) for _, _, frame in series_outputs))
+
+    # Out-of-sample accuracy from a rolling-origin backtest
+    backtest_tasks = tasks if args.backtest_all else [total_task]
+    with profiler.stage('backtest', rows_in=len(backtest_tasks)) as stage:
+        backtest_points = run_backtest(backtest_tasks, n_cutoffs=args.cutoffs, horizon=args.horizon,
+                                       stride=args.stride, max_workers=args.workers)
+        backtest = horizon_metrics(backtest_points, horizon_buckets(args.horizon))
+        stage['rows_out'] = len(backtest_points)
+    backtest.to_csv('backtest.csv', index=False)
+    mae, mape = None, None
+    # The backtest refits the base total model; reconciled forecasts are not backtested
+    accuracy_of = 'base total model, before reconciliation' if args.hierarchy else 'total model'
+    if backtest_points.empty:
+        print("Model accuracy not measured: the history is too short for a backtest")
+    else:
+        mae, mape = overall_metrics(backtest_points, total_task['label'])
+        print(f"Model Accuracy Metrics of the {accuracy_of} (rolling-origin backtest, {args.cutoffs} cutoffs):")
+        print(f"  Mean Absolute Error (MAE): ${mae:.2f}")
+        print(f"  Mean Absolute Percentage Error (MAPE): {mape:.1f}%")
+        print("Backtest metrics by horizon saved to 'backtest.csv'")
+
+    predicted_90_day_sales, category_forecasts = export.result()
+    background.wait()
+
+    # Generate summary statistics
+    summary_stats = {
+        'total_historical_days': len(prophet_data),
+        'forecast_days': 90,
+        'avg_daily_sales': kpis['avg_daily_sales'],
+        'total_historical_sales': kpis['total_sales'],
+        'predicted_90_day_sales': predicted_90_day_sales,
+        'model_mae': mae,
+        'model_mape': mape,
+        'model_accuracy_of': accuracy_of,
+        'categories_forecasted': list(category_forecasts.keys()),
+        'fit_wall_time': fit_stats['wall_time'],
+        'fit_speedup': fit_stats['speedup']
+    }
+
+    # Save summary
+    with open('forecast_summary.json', 'w') as f:
+        json.dump(summary_stats, f, indent=2, default=str)
+    write_profile(profiler, args, PROFILE_FILE)
+
+    print("\nForecast Summary:")
+    print(f"  Historical period: {len(prophet_data)} days")
+    print(f"  Average daily sales: ${summary_stats['avg_daily_sales']:.2f}")
+    print(f"  Total historical sales: ${summary_stats['total_historical_sales']:,.2f}")
+    print(f"  Predicted 90-day sales: ${summary_stats['predicted_90_day_sales']:,.2f}")
+    print(f"  Categories forecasted: {len(category_forecasts)}")
+
+    print("\nAll forecast files generated successfully!")
+    print("Files created:")
+    print("  - forecast_data.csv (daily forecasts)")
+    print("  - monthly_forecast.csv (monthly averages)")
+    for filename in category_forecasts.values():
+        print(f"  - {filename}")
+    if args.hierarchy:
+        print("  - hierarchical_forecast.csv")
+    print("  - backtest.csv")
+    print("  - forecast_summary.json")
+    print(f"  - {PYRAMID_DIR}/ (chart data at day/week/month/quarter resolution)")
+    if profiler.enabled:
+        print(f"  - {PROFILE_FILE}")
+
+if __name__ == "__main__":
+    main()
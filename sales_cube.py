@@ -0,0 +1,69 @@
+import pandas as pd
+from data_loader import CHUNK_SIZE, DTYPES, read_csv_chunks
+
+CUBE_DIMENSIONS = ['Order Date', 'Category', 'Region', 'Segment', 'Sub-Category']
+VALUE_COLUMNS = ['Sales', 'Profit', 'Quantity']
+CUBE_COLUMNS = CUBE_DIMENSIONS + VALUE_COLUMNS
+
+def build_cube(df):
+    """Aggregate transactions in one pass into sum/count cells over date x dimensions"""
+    dims = [dim for dim in CUBE_DIMENSIONS if dim in df.columns]
+    # Compact frames carry float32/int8 values; widen them before summing so cells
+    # accumulate at full precision instead of being cast after a float32 sum
+    values = df[VALUE_COLUMNS].astype({col: DTYPES[col] for col in VALUE_COLUMNS})
+    # Rows with a missing dimension value still count towards every total
+    cube = values.groupby([df[dim] for dim in dims], observed=True, dropna=False).agg(['sum', 'count'])
+    cube.columns = ['_'.join(col) for col in cube.columns]
+    return cube
+
+def build_cube_from_csv(path, chunksize=CHUNK_SIZE):
+    """Build the cube by folding bounded CSV chunks, so memory does not grow with file size"""
+    cube = None
+    for chunk in read_csv_chunks(path, columns=CUBE_COLUMNS, chunksize=chunksize):
+        cube = fold_cube(cube, build_cube(chunk))
+    return cube.sort_index()
+
+def fold_cube(cube, part):
+    """Add the cells of part into cube; cells present in only one of them are kept as they are"""
+    if cube is None:
+        return part
+    cube = cube.add(part, fill_value=0)
+    # Folding with fill_value upcasts to float; restore integer sums and counts
+    int_columns = [col for col in cube.columns if col.endswith('_count') or col == 'Quantity_sum']
+    cube[int_columns] = cube[int_columns].astype('int64')
+    return cube
+
+def _rollup(cube, dims):
+    return cube.groupby(level=dims, observed=True).sum()
+
+def daily_from_cube(cube):
+    """Daily Sales, Profit and Quantity totals"""
+    daily = _rollup(cube, 'Order Date')[[f'{col}_sum' for col in VALUE_COLUMNS]]
+    daily.columns = VALUE_COLUMNS
+    return daily.sort_index().reset_index()
+
+def dimension_daily(cube, dimension, value='Sales'):
+    """Daily sums of one value indexed by (dimension value, Order Date)"""
+    return _rollup(cube, [dimension, 'Order Date'])[f'{value}_sum']
+
+def summary_from_cube(cube, dimension):
+    """Sum and mean of Sales, Profit and Quantity per value of dimension"""
+    rolled = _rollup(cube, dimension)
+    summary = pd.DataFrame(index=rolled.index)
+    for col in VALUE_COLUMNS:
+        summary[f'{col}_sum'] = rolled[f'{col}_sum'].astype(DTYPES[col])
+        summary[f'{col}_mean'] = rolled[f'{col}_sum'] / rolled[f'{col}_count']
+    return summary.round(2).reset_index()
+
+def kpis_from_cube(cube):
+    """Headline totals and averages for the summary output"""
+    totals = cube.sum()
+    n_days = cube.index.get_level_values('Order Date').nunique()
+    return {
+        'total_sales': totals['Sales_sum'],
+        'total_profit': totals['Profit_sum'],
+        'total_quantity': int(totals['Quantity_sum']),
+        'transactions': int(totals['Sales_count']),
+        'days': n_days,
+        'avg_daily_sales': totals['Sales_sum'] / n_days
+    }
@@ -4,12 +4,34 @@ import numpy as np
 from prophet import Prophet
 import plotly.graph_objects as go
 import plotly.express as px
+import argparse
 import warnings
+import json
 import os
 from datetime import datetime
+from model_cache import ModelCache, fingerprint, fit_incremental
+from data_loader import CHUNK_SIZE, compact_frame, load_sales
+from fast_predict import add_predict_arguments, predict_forecast, predict_options
+from forecast_io import add_output_arguments, save_table
+from chart_pyramid import write_pyramid
+from chart_renderer import print_report, render_charts
+from background_tasks import BackgroundTasks, add_concurrency_arguments
+from incremental_ingest import update_cube
+from tuning import add_tuning_arguments, save_best_params, tune_tasks, tuned_params
+from instrumentation import (PROFILE_FILE, StageProfiler, add_profile_arguments, profiler_from_args,
+                             write_profile)
+from sales_cube import (CUBE_COLUMNS, build_cube, build_cube_from_csv, daily_from_cube,
+                        kpis_from_cube, summary_from_cube)
 
 warnings.filterwarnings('ignore')
 
+PROPHET_PARAMS = {
+    'yearly_seasonality': True,
+    'weekly_seasonality': True,
+    'daily_seasonality': False,
+    'seasonality_mode': 'multiplicative'
+}
+
 def create_folders():
     """Create required folder structure"""
     os.makedirs("data", exist_ok=True)
@@ -17,52 +39,90 @@ def create_folders():
     os.makedirs("images", exist_ok=True)
     print("Folder structure created: data/, forecast/, images/")
 
-def load_and_prepare_data():
-    """Load and prepare data for forecasting"""
-    print("Loading Superstore dataset...")
-    df = pd.read_csv('data/superstore_sales.csv')
-    df['Order Date'] = pd.to_datetime(df['Order Date'])
+def load_and_prepare_data(streaming=False, chunksize=CHUNK_SIZE, profiler=None, compact=False,
+                          incremental=False, settled_only=False):
+    """Load the dataset into the aggregation cube and prepare for forecasting"""
+    profiler = profiler or StageProfiler(enabled=False)
+    if incremental:
+        # Only rows appended since the last run (and new files in data/) are read
+        print("Updating aggregates with new rows from data/...")
+        with profiler.stage('ingest') as stage:
+            cube, stage['rows_in'] = update_cube('data', final=not settled_only)
+            if cube is None:
+                raise FileNotFoundError("--incremental found no CSV files with rows in data/")
+            stage['rows_out'] = len(cube)
+    elif streaming:
+        # Fold bounded chunks into the cube without holding all rows in memory
+        print(f"Streaming Superstore dataset in chunks of {chunksize:,} rows...")
+        with profiler.stage('load_aggregate') as stage:
+            cube = build_cube_from_csv('data/superstore_sales.csv', chunksize)
+            stage['rows_in'] = int(cube['Sales_count'].sum())
+            stage['rows_out'] = len(cube)
+    else:
+        print("Loading Superstore dataset...")
+        with profiler.stage('load') as stage:
+            df = load_sales('data/superstore_sales.csv', columns=CUBE_COLUMNS)
+            stage['rows_out'] = len(df)
+        if compact:
+            print("Compacting transaction table:")
+            with profiler.stage('compact', rows_in=len(df)):
+                df = compact_frame(df, CUBE_COLUMNS, report=True)
+        with profiler.stage('aggregate', rows_in=len(df)) as stage:
+            cube = build_cube(df)
+            stage['rows_out'] = len(cube)
 
     # Aggregate daily sales
-    daily_sales = df.groupby('Order Date').agg({
-        'Sales': 'sum',
-        'Profit': 'sum',
-        'Quantity': 'sum'
-    }).reset_index()
+    with profiler.stage('daily_rollup', rows_in=len(cube)) as stage:
+        daily_sales = daily_from_cube(cube)
+        stage['rows_out'] = len(daily_sales)
 
     # Prepare for Prophet
     forecast_data = daily_sales.rename(columns={'Order Date': 'ds', 'Sales': 'y'})
     forecast_data = forecast_data.sort_values('ds').reset_index(drop=True)
 
     print(f"Data prepared: {len(forecast_data)} daily records")
-    return df, forecast_data
+    return cube, forecast_data
 
-def train_prophet_model(forecast_data):
-    """Train Prophet forecasting model"""
-    print("Training Prophet model...")
-    model = Prophet(
-        yearly_seasonality=True,
-        weekly_seasonality=True,
-        daily_seasonality=False,
-        seasonality_mode='multiplicative'
-    )
+def train_prophet_model(forecast_data, cache=None, warm_start=True, predict_kwargs=None, profiler=None,
+                        params=None):
+    """Train Prophet forecasting model, reusing a cached fit for unchanged data"""
+    profiler = profiler or StageProfiler(enabled=False)
+    params = params or PROPHET_PARAMS
+    key = fingerprint(forecast_data, params) if cache else None
+    with profiler.stage('cache_lookup', rows_in=len(forecast_data)):
+        model = cache.get(key) if cache else None
 
-    model.fit(forecast_data[['ds', 'y']])
+    if model is not None:
+        print("Loaded cached Prophet model (input data unchanged)")
+    else:
+        print("Training Prophet model...")
+        with profiler.stage('fit', rows_in=len(forecast_data)):
+            if warm_start:
+                model, change = fit_incremental(lambda: Prophet(**params), forecast_data,
+                                                'total', params)
+                if change == 'append':
+                    print("New days appended since last fit: warm-started from previous parameters")
+            else:
+                model = Prophet(**params)
+                model.fit(forecast_data[['ds', 'y']])
+        if cache:
+            with profiler.stage('cache_store'):
+                cache.put(key, model)
 
     # Create 90-day forecast
-    future = model.make_future_dataframe(periods=90, freq='D')
-    forecast = model.predict(future)
+    with profiler.stage('predict', rows_in=len(forecast_data)) as stage:
+        forecast = predict_forecast(model, periods=90, **(predict_kwargs or {}))
+        stage['rows_out'] = len(forecast)
 
     print("Forecasting completed (90 days ahead)")
     return model, forecast
 
-def save_forecast_data(forecast, forecast_data):
-    """Save forecast results to CSV files"""
+def save_forecast_data(forecast, forecast_data, binary_format=None):
+    """Save forecast results to CSV files, optionally with Parquet/Arrow copies"""
 
     # Main daily forecast
-    forecast_output = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].copy()
-    forecast_output['ds'] = forecast_output['ds'].dt.strftime('%Y-%m-%d')
-    forecast_output.to_csv('forecast/daily_forecast.csv', index=False)
+    forecast_output = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+    save_table(forecast_output, 'forecast/daily_forecast.csv', binary_format)
 
     # Monthly forecast
     last_historical_date = forecast_data['ds'].max()
@@ -79,39 +139,73 @@ def save_forecast_data(forecast, forecast_data):
     month_names = {1: 'Jan', 2: 'Feb', 3: 'Mar', 4: 'Apr', 5: 'May', 6: 'Jun',
                    7: 'Jul', 8: 'Aug', 9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Dec'}
     monthly_forecast['month_name'] = monthly_forecast['month'].map(month_names)
-    monthly_forecast.to_csv('forecast/monthly_forecast.csv', index=False)
+    save_table(monthly_forecast, 'forecast/monthly_forecast.csv', binary_format)
 
     print("Forecast data saved to CSV files")
 
-def create_analysis_files(df):
-    """Create category and regional analysis files"""
+def save_chart_pyramid(forecast, forecast_data):
+    """Precompute the dashboard's multi-resolution chart data for the total forecast"""
+    series = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].merge(
+        forecast_data.rename(columns={'y': 'actual'}), on='ds', how='left')
+    write_pyramid({'total': series}, 'forecast', history_end=forecast_data['ds'].max())
+    print("Chart pyramid saved to forecast/pyramid/")
 
-    # Category analysis
-    category_summary = df.groupby('Category').agg({
-        'Sales': ['sum', 'mean'],
-        'Profit': ['sum', 'mean'],
-        'Quantity': ['sum', 'mean']
-    }).round(2)
+def create_analysis_files(cube, binary_format=None):
+    """Create category and regional analysis files"""
+    save_table(summary_from_cube(cube, 'Category'), 'forecast/category_analysis.csv', binary_format)
+    save_table(summary_from_cube(cube, 'Region'), 'forecast/regional_analysis.csv', binary_format)
 
-    category_summary.columns = ['_'.join(col).strip() for col in category_summary.columns]
-    category_summary = category_summary.reset_index()
-    category_summary.to_csv('forecast/category_analysis.csv', index=False)
+    print("Analysis files created: category_analysis.csv, regional_analysis.csv")
 
-    # Regional analysis
-    regional_analysis = df.groupby('Region').agg({
-        'Sales': ['sum', 'mean'],
-        'Profit': ['sum', 'mean'],
-        'Quantity': ['sum', 'mean']
-    }).round(2)
+def create_charts():
+    """Render the dashboard PNGs in images/ from the files just written"""
+    print("Rendering charts:")
+    print_report(render_charts())
 
-    regional_analysis.columns = ['_'.join(col).strip() for col in regional_analysis.columns]
-    regional_analysis = regional_analysis.reset_index()
-    regional_analysis.to_csv('forecast/regional_analysis.csv', index=False)
+def save_kpis(kpis, forecast, forecast_data):
+    """Save headline KPIs for the dashboard API"""
+    last_historical_date = forecast_data['ds'].max()
+    kpis = dict(kpis,
+                total_90_day_forecast=forecast[forecast['ds'] > last_historical_date]['yhat'].sum(),
+                last_historical_date=last_historical_date.strftime('%Y-%m-%d'))
+    with open('forecast/kpis.json', 'w') as f:
+        json.dump(kpis, f, indent=2, default=float)
 
-    print("Analysis files created: category_analysis.csv, regional_analysis.csv")
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="AI-Powered Sales Forecasting Dashboard")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always refit the model from scratch, bypassing the model cache and the saved fit state")
+    parser.add_argument('--cache-dir', default='models/cache',
+                        help="Directory of the fitted-model cache")
+    parser.add_argument('--cache-max-mb', type=float, default=200,
+                        help="Size limit of the model cache before LRU eviction")
+    parser.add_argument('--cold-start', action='store_true',
+                        help="Fit from scratch even when only new days were appended")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Aggregate the CSV in bounded chunks instead of loading it whole")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE,
+                        help="Rows per chunk in streaming mode")
+    parser.add_argument('--compact', action='store_true',
+                        help="Hold the transaction table as categoricals and downcast numbers")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Fold only rows appended to the CSV files in data/ into the saved aggregates")
+    parser.add_argument('--settled-only', action='store_true',
+                        help="With --incremental, leave a last line without its newline for a later run "
+                             "until its file stops changing (used by incremental_ingest.py --watch)")
+    add_predict_arguments(parser)
+    parser.add_argument('--charts', action='store_true',
+                        help="Render the dashboard PNGs once the outputs are written")
+    add_profile_arguments(parser)
+    add_output_arguments(parser)
+    add_concurrency_arguments(parser)
+    add_tuning_arguments(parser)
+    return parser.parse_args()
 
 def main():
     """Main execution function"""
+    args = parse_args()
+    profiler = profiler_from_args(args)
     print("=== AI-Powered Sales Forecasting Dashboard ===")
     print("Starting forecasting pipeline...")
 
@@ -119,29 +213,61 @@ def main():
     create_folders()
 
     # Step 2: Load and prepare data
-    df, forecast_data = load_and_prepare_data()
+    cube, forecast_data = load_and_prepare_data(args.streaming, args.chunksize, profiler, args.compact,
+                                                 args.incremental, args.settled_only)
+
+    # The analysis tables only need the cube, so with --concurrent they are written during the fit
+    background = BackgroundTasks(args.concurrent, profiler, args.io_threads)
+    analysis = background.submit('analysis', create_analysis_files, cube, args.binary_format,
+                                 rows_in=len(cube))
 
-    # Step 3: Train model and forecast
-    model, forecast = train_prophet_model(forecast_data)
+    # Step 3: Train model and forecast, with the settings of the last tuning run if there is one
+    if args.tune:
+        print("Tuning Prophet settings on rolling backtests...")
+        with profiler.stage('tune', rows_in=len(forecast_data)):
+            best = tune_tasks([{'name': 'total', 'series': forecast_data, 'params': PROPHET_PARAMS}],
+                              n_cutoffs=args.tune_cutoffs, keep=args.tune_keep)
+        save_best_params(best)
+    cache = None if args.no_cache else ModelCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+    # --no-cache means a real fit: the saved state would otherwise be returned for unchanged data
+    warm_start = not (args.cold_start or args.no_cache)
+    model, forecast = train_prophet_model(forecast_data, cache, warm_start=warm_start,
+                                         predict_kwargs=predict_options(args), profiler=profiler,
+                                         params=tuned_params('total', PROPHET_PARAMS))
 
     # Step 4: Save results
-    save_forecast_data(forecast, forecast_data)
-    create_analysis_files(df)
+    saved = background.submit('save', save_forecast_data, forecast, forecast_data, args.binary_format,
+                              rows_in=len(forecast))
+    background.submit('pyramid', save_chart_pyramid, forecast, forecast_data, rows_in=len(forecast))
+    kpis = kpis_from_cube(cube)
+    save_kpis(kpis, forecast, forecast_data)
+    if args.charts:
+        background.submit('charts', create_charts, after=[saved, analysis])
+    background.wait()
 
     # Step 5: Print summary
-    total_sales = df['Sales'].sum()
-    avg_daily_sales = forecast_data['y'].mean()
+    total_sales = kpis['total_sales']
+    avg_daily_sales = kpis['avg_daily_sales']
     future_90_days = forecast[forecast['ds'] > forecast_data['ds'].max()]['yhat'].sum()
 
     print("\n=== FORECASTING COMPLETE ===")
     print(f"Total Historical Sales: ${total_sales:,.2f}")
     print(f"Average Daily Sales: ${avg_daily_sales:,.2f}")
     print(f"90-Day Forecast Total: ${future_90_days:,.2f}")
+    if cache:
+        stats = cache.stats()
+        print(f"Model cache: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+              f"{stats['entries']} entries ({stats['bytes'] / 1024:,.0f} KB)")
     print("\nFiles created:")
     print("- forecast/daily_forecast.csv")
     print("- forecast/monthly_forecast.csv")
     print("- forecast/category_analysis.csv")
     print("- forecast/regional_analysis.csv")
+    print("- forecast/kpis.json")
+    print("- forecast/pyramid/ (chart data at day/week/month/quarter resolution)")
+    if args.charts:
+        print("- images/*.png")
+    write_profile(profiler, args, os.path.join('forecast', PROFILE_FILE))
     print("\nNext: Create charts and dashboard using the CSV files!")
 
 if __name__ == "__main__":
@@ -1,19 +1,24 @@
-# Load the dataset and prepare for forecasting
-df = pd.read_csv('data/superstore_sales.csv')
+from data_loader import load_sales
+from sales_cube import (CUBE_COLUMNS, build_cube, build_cube_from_csv, daily_from_cube,
+                        kpis_from_cube)
 
-# Convert Order Date to datetime
-df['Order Date'] = pd.to_datetime(df['Order Date'])
+# Set STREAMING = True for files larger than memory: the CSV is folded into the
+# aggregation cube chunk by chunk instead of being loaded whole
+STREAMING = False
 
-print("Data loaded successfully!")
-print(f"Dataset shape: {df.shape}")
-print(f"Date range: {df['Order Date'].min()} to {df['Order Date'].max()}")
+# One pass over the raw rows builds the cube; every later table is derived from it
+if STREAMING:
+    cube = build_cube_from_csv('data/superstore_sales.csv')
+else:
+    # Load the dataset (typed, column-pruned, Parquet-cached)
+    cube = build_cube(load_sales('data/superstore_sales.csv', columns=CUBE_COLUMNS))
 
 # Aggregate sales by date for time series forecasting
-daily_sales = df.groupby('Order Date').agg({
-    'Sales': 'sum',
-    'Profit': 'sum',
-    'Quantity': 'sum'
-}).reset_index()
+daily_sales = daily_from_cube(cube)
+
+print("Data loaded successfully!")
+print(f"Transactions: {kpis_from_cube(cube)['transactions']}")
+print(f"Date range: {daily_sales['Order Date'].min()} to {daily_sales['Order Date'].max()}")
 
 # Prepare data for Prophet (requires 'ds' and 'y' columns)
 forecast_data = daily_sales.rename(columns={'Order Date': 'ds', 'Sales': 'y'})
@@ -26,39 +26,27 @@ monthly_forecast.to_csv('forecast/monthly_forecast.csv', index=False)
 print("Monthly forecast saved to 'forecast/monthly_forecast.csv'")
 print(monthly_forecast)
 
-# Create category-wise historical analysis and simple forecast
-category_sales = df.groupby(['Category', df['Order Date'].dt.to_period('M')]).agg({
-    'Sales': 'sum',
-    'Profit': 'sum',
-    'Quantity': 'sum'
-}).reset_index()
+# Create category-wise historical analysis from the aggregation cube built in script_3
+from sales_cube import dimension_daily, summary_from_cube
+
+category_sales = pd.concat({
+    col: dimension_daily(cube, 'Category', value=col) for col in ['Sales', 'Profit', 'Quantity']
+}, axis=1).reset_index()
+category_sales = category_sales.groupby(
+    ['Category', category_sales['Order Date'].dt.to_period('M')]
+)[['Sales', 'Profit', 'Quantity']].sum().reset_index()
 
 category_sales['Order Date'] = category_sales['Order Date'].dt.to_timestamp()
 
 # Save category analysis
-category_summary = df.groupby('Category').agg({
-    'Sales': ['sum', 'mean'],
-    'Profit': ['sum', 'mean'],
-    'Quantity': ['sum', 'mean']
-}).round(2)
-
-# Flatten column names
-category_summary.columns = ['_'.join(col).strip() for col in category_summary.columns]
-category_summary = category_summary.reset_index()
+category_summary = summary_from_cube(cube, 'Category')
 category_summary.to_csv('forecast/category_analysis.csv', index=False)
 
 print("\nCategory analysis saved to 'forecast/category_analysis.csv'")
 print(category_summary)
 
 # Create regional analysis
-regional_analysis = df.groupby('Region').agg({
-    'Sales': ['sum', 'mean'],
-    'Profit': ['sum', 'mean'],
-    'Quantity': ['sum', 'mean']
-}).round(2)
-
-regional_analysis.columns = ['_'.join(col).strip() for col in regional_analysis.columns]
-regional_analysis = regional_analysis.reset_index()
+regional_analysis = summary_from_cube(cube, 'Region')
 regional_analysis.to_csv('forecast/regional_analysis.csv', index=False)
 
 print("\nRegional analysis saved to 'forecast/regional_analysis.csv'")
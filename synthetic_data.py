@@ -0,0 +1,201 @@
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import time
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+CATEGORIES = ['Furniture', 'Office Supplies', 'Technology']
+REGIONS = ['East', 'West', 'Central', 'South']
+SEGMENTS = ['Consumer', 'Corporate', 'Home Office']
+SHIP_MODES = ['Standard Class', 'Second Class', 'First Class', 'Same Day']
+CITIES = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix']
+STATES = ['New York', 'California', 'Illinois', 'Texas', 'Arizona']
+SUB_CATEGORIES = ['Chairs', 'Tables', 'Phones', 'Storage', 'Art', 'Binders']
+
+# Higher sales in Q4, lower in Q1
+SEASONAL_MULTIPLIER = {
+    1: 0.7, 2: 0.8, 3: 0.9, 4: 1.0, 5: 1.0, 6: 1.1,
+    7: 1.1, 8: 1.2, 9: 1.1, 10: 1.3, 11: 1.5, 12: 1.6
+}
+
+# Profit = Sales * margin - Sales * Discount * discount_impact, margin drawn uniformly
+PROFIT_MODEL = {'margin_min': 0.2, 'margin_max': 0.4, 'discount_impact': 0.5}
+
+CHUNK_ROWS = 1_000_000
+
+def dimension_values(base, n, prefix):
+    """First n names from base, extended with numbered names when n is larger"""
+    return list(base[:n]) + [f'{prefix} {i}' for i in range(len(base) + 1, n + 1)]
+
+def _ids(prefix, numbers):
+    # Vectorized prefix + number, without a Python loop over rows
+    return np.char.add(prefix, numbers.astype(str))
+
+def generate_superstore(n_rows, n_categories=3, n_regions=4, start='2021-01-01', end='2024-12-31',
+                        seed=42, row_offset=0, seasonal_multiplier=None, profit_model=None):
+    """Generate a Superstore-shaped transaction table of n_rows rows
+
+    seed may be an int or a SeedSequence; row_offset numbers the rows after an
+    earlier chunk so chunks can be generated independently.
+    """
+    rng = np.random.default_rng(seed)
+    seasonal_multiplier = seasonal_multiplier or SEASONAL_MULTIPLIER
+    profit_model = dict(PROFIT_MODEL, **(profit_model or {}))
+    date_range = pd.date_range(start=start, end=end, freq='D')
+    categories = dimension_values(CATEGORIES, n_categories, 'Category')
+    regions = dimension_values(REGIONS, n_regions, 'Region')
+
+    order_dates = pd.DatetimeIndex(rng.choice(date_range.values, n_rows))
+    years = rng.integers(date_range.year.min(), date_range.year.max() + 1, n_rows)
+    row_numbers = np.arange(row_offset, row_offset + n_rows)
+
+    df = pd.DataFrame({
+        'Row ID': row_numbers + 1,
+        'Order ID': np.char.add(_ids('US-', years), _ids('-', rng.integers(100000, 999999, n_rows))),
+        'Order Date': order_dates,
+        'Ship Date': order_dates + pd.to_timedelta(rng.integers(3, 8, n_rows), unit='D'),
+        'Ship Mode': rng.choice(SHIP_MODES, n_rows),
+        'Customer ID': _ids('CG-', rng.integers(10000, 99999, n_rows)),
+        'Customer Name': _ids('Customer_', row_numbers),
+        'Segment': rng.choice(SEGMENTS, n_rows),
+        'Country': 'United States',
+        'City': rng.choice(CITIES, n_rows),
+        'State': rng.choice(STATES, n_rows),
+        'Postal Code': rng.integers(10000, 99999, n_rows),
+        'Region': rng.choice(regions, n_rows),
+        'Product ID': _ids('FUR-', rng.integers(1000, 9999, n_rows)),
+        'Category': rng.choice(categories, n_rows),
+        'Sub-Category': rng.choice(SUB_CATEGORIES, n_rows),
+        'Product Name': _ids('Product_', row_numbers),
+        'Sales': rng.lognormal(mean=6, sigma=1, size=n_rows),
+        'Quantity': rng.integers(1, 10, n_rows),
+        'Discount': rng.uniform(0, 0.8, n_rows)
+    })
+
+    # Seasonality and profit model from script_2.py
+    month_factor = np.array([seasonal_multiplier.get(month, 1.0) for month in range(1, 13)])
+    sales = df['Sales'].to_numpy() * month_factor[order_dates.month.to_numpy() - 1]
+    margin = rng.uniform(profit_model['margin_min'], profit_model['margin_max'], n_rows)
+    df['Sales'] = sales
+    df['Profit'] = sales * margin - sales * df['Discount'].to_numpy() * profit_model['discount_impact']
+    return df
+
+def chunk_seeds(seed, n_chunks):
+    """Independent RNG streams per chunk, so output does not depend on how chunks are scheduled"""
+    return np.random.SeedSequence(seed).spawn(n_chunks)
+
+def _generate_chunk(job):
+    offset, n_rows, seed, options = job
+    return generate_superstore(n_rows, seed=seed, row_offset=offset, **options)
+
+def _to_arrow(chunk, csv=False):
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    if not csv:
+        return table
+    # Dates as date32 so CSV output keeps the %Y-%m-%d format the loaders expect
+    for column in ('Order Date', 'Ship Date'):
+        table = table.set_column(table.schema.get_field_index(column), column,
+                                 table[column].cast(pa.date32()))
+    return table
+
+def write_superstore(path, n_rows, n_categories=3, n_regions=4, seed=42, chunk_rows=CHUNK_ROWS,
+                     workers=1, **options):
+    """Stream a synthetic dataset to CSV or Parquet (by extension) in chunks of chunk_rows rows"""
+    parquet = path.endswith('.parquet')
+    if parquet and not HAS_PARQUET:
+        raise ImportError("Writing Parquet requires pyarrow")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    offsets = list(range(0, n_rows, chunk_rows))
+    options = dict(options, n_categories=n_categories, n_regions=n_regions)
+    jobs = [(offset, min(chunk_rows, n_rows - offset), chunk_seed, options)
+            for offset, chunk_seed in zip(offsets, chunk_seeds(seed, len(offsets)))]
+
+    tmp_path = path + '.tmp'
+    writer = None
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        # Chunks are generated a window at a time so at most 2 x workers are held in memory
+        window = max(workers, 1) * 2
+        for i in range(0, len(jobs), window):
+            batch = jobs[i:i + window]
+            chunks = pool.map(_generate_chunk, batch) if pool else map(_generate_chunk, batch)
+            for chunk in chunks:
+                if not HAS_PARQUET:
+                    first = writer is None
+                    chunk.to_csv(tmp_path, mode='w' if first else 'a', header=first, index=False)
+                    writer = True
+                    continue
+                # pyarrow's writers are an order of magnitude faster than DataFrame.to_csv
+                table = _to_arrow(chunk, csv=not parquet)
+                if writer is None:
+                    writer = (pq.ParquetWriter(tmp_path, table.schema) if parquet
+                              else pa_csv.CSVWriter(tmp_path, table.schema))
+                writer.write_table(table)
+    finally:
+        if pool:
+            pool.shutdown()
+        if HAS_PARQUET and writer:
+            writer.close()
+    os.replace(tmp_path, path)
+    return path
+
+def parse_seasonality(text):
+    """Twelve comma-separated monthly multipliers, or 'none' for flat sales"""
+    if text == 'none':
+        return {month: 1.0 for month in range(1, 13)}
+    values = [float(value) for value in text.split(',')]
+    if len(values) != 12:
+        raise argparse.ArgumentTypeError("expected 12 comma-separated monthly multipliers")
+    return dict(zip(range(1, 13), values))
+
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Generate a synthetic Superstore sales dataset")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Number of transactions")
+    parser.add_argument('--output', default='data/superstore_sales.csv',
+                        help="Output file; a .parquet extension writes Parquet")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help="Rows generated and written per chunk")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processes generating chunks in parallel (same data for any value)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed")
+    parser.add_argument('--categories', type=int, default=3, help="Number of product categories")
+    parser.add_argument('--regions', type=int, default=4, help="Number of regions")
+    parser.add_argument('--start', default='2021-01-01', help="First order date")
+    parser.add_argument('--end', default='2024-12-31', help="Last order date")
+    parser.add_argument('--seasonality', type=parse_seasonality, default=None,
+                        help="Monthly sales multipliers Jan..Dec, e.g. 0.7,0.8,...,1.6, or 'none'")
+    parser.add_argument('--margin-min', type=float, default=PROFIT_MODEL['margin_min'],
+                        help="Lowest profit margin before discounts")
+    parser.add_argument('--margin-max', type=float, default=PROFIT_MODEL['margin_max'],
+                        help="Highest profit margin before discounts")
+    parser.add_argument('--discount-impact', type=float, default=PROFIT_MODEL['discount_impact'],
+                        help="Share of the discounted amount taken off profit")
+    return parser.parse_args()
+
+def main():
+    """Main execution function"""
+    args = parse_args()
+    profit_model = {'margin_min': args.margin_min, 'margin_max': args.margin_max,
+                    'discount_impact': args.discount_impact}
+    print(f"Generating {args.rows:,} rows in chunks of {args.chunk_rows:,} "
+          f"with {args.workers} worker(s)...")
+    start = time.perf_counter()
+    write_superstore(args.output, args.rows, args.categories, args.regions, args.seed,
+                     args.chunk_rows, args.workers, start=args.start, end=args.end,
+                     seasonal_multiplier=args.seasonality, profit_model=profit_model)
+    elapsed = time.perf_counter() - start
+    print(f"Dataset saved to '{args.output}' in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
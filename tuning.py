@@ -0,0 +1,180 @@
+import pandas as pd
+import numpy as np
+from concurrent.futures import as_completed
+from itertools import product
+from backtest import _predict_horizon, make_cutoffs
+from model_cache import fingerprint
+from parallel_forecast import build_model, process_pool
+import warnings
+import math
+import json
+import time
+import os
+
+warnings.filterwarnings('ignore')
+
+RESULTS_FILE = 'models/tuning/results.json'
+BEST_PARAMS_FILE = 'best_params.json'
+
+DEFAULT_GRID = {
+    'changepoint_prior_scale': [0.01, 0.05, 0.1, 0.5],
+    'seasonality_prior_scale': [0.1, 1.0, 10.0],
+    'seasonality_mode': ['additive', 'multiplicative']
+}
+
+def expand_grid(grid):
+    """Every combination of the grid values as a list of parameter dicts"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in product(*(grid[name] for name in names))]
+
+def load_results(path=RESULTS_FILE):
+    """Finished evaluations keyed by candidate x data fingerprint"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_results(results, path=RESULTS_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(results, f)
+    os.replace(path + '.tmp', path)
+
+def result_key(task, params, cutoff, horizon):
+    """Fingerprint of the training and scoring window together with the full model settings"""
+    window = task['series'][task['series']['ds'] <= cutoff + pd.Timedelta(days=horizon)]
+    settings = dict(params, country_holidays=task.get('country_holidays'),
+                    cutoff=str(cutoff), horizon=horizon)
+    return fingerprint(window, settings)
+
+def evaluate(task, params, cutoff, horizon):
+    """Fit one candidate on the history up to cutoff and score the next horizon days"""
+    series = task['series']
+    model = build_model(dict(task, params=params))
+    model.fit(series[series['ds'] <= cutoff][['ds', 'y']])
+    forecast = _predict_horizon(model, cutoff, horizon)
+    y = series.set_index('ds')['y'].reindex(forecast['ds']).to_numpy()
+    err = np.abs(forecast['yhat'].to_numpy() - y)
+    valid = ~np.isnan(y)
+    nonzero = valid & (y != 0)
+    return {'mae': float(err[valid].mean()),
+            'mape': float((err[nonzero] / y[nonzero]).mean() * 100) if nonzero.any() else None}
+
+def _evaluate_unit(unit):
+    task, params, cutoff, horizon = unit
+    return evaluate(task, params, cutoff, horizon)
+
+def tune_tasks(tasks, grid=None, n_cutoffs=3, horizon=90, stride=30, keep=1 / 3,
+               max_workers=None, results_path=RESULTS_FILE):
+    """Successive-halving search of Prophet settings for every task
+
+    All candidates of a series share one set of backtest cutoffs. Every candidate is scored on
+    the most recent cutoff first; after each cutoff only the best `keep` fraction is scored on
+    the next one. Scores are mean MAE over the cutoffs a candidate reached, and every finished
+    (candidate, data window) evaluation is stored so reruns only fit what changed. Series too
+    short for any cutoff are left out of the result and keep their current settings.
+    """
+    candidates = expand_grid(grid or DEFAULT_GRID)
+    results = load_results(results_path)
+    max_workers = max_workers or os.cpu_count() or 1
+    cutoffs = {task['name']: make_cutoffs(task['series']['ds'], n_cutoffs, horizon, stride)[::-1]
+               for task in tasks}
+    untuned = [task['name'] for task in tasks if not cutoffs[task['name']]]
+    if untuned:
+        print(f"Not tuned (history too short for a {horizon}-day backtest): {', '.join(untuned)}")
+    tasks = [task for task in tasks if cutoffs[task['name']]]
+    params = {task['name']: [dict(task['params'], **candidate) for candidate in candidates]
+              for task in tasks}
+    alive = {task['name']: list(range(len(candidates))) for task in tasks}
+    scores = {task['name']: {i: [] for i in range(len(candidates))} for task in tasks}
+
+    for rung in range(n_cutoffs):
+        units, keys = [], []
+        reused = 0
+        for task in tasks:
+            name = task['name']
+            if rung >= len(cutoffs[name]):
+                continue
+            cutoff = cutoffs[name][rung]
+            for i in alive[name]:
+                key = result_key(task, params[name][i], cutoff, horizon)
+                if key in results:
+                    scores[name][i].append(results[key]['mae'])
+                    reused += 1
+                else:
+                    units.append((task, params[name][i], cutoff, horizon))
+                    keys.append((name, i, key))
+        if not units and not reused:
+            break
+
+        start = time.perf_counter()
+        if max_workers == 1 or len(units) <= 1:
+            outcomes = [(j, _evaluate_unit(unit)) for j, unit in enumerate(units)]
+        else:
+            with process_pool(min(max_workers, len(units))) as pool:
+                futures = {pool.submit(_evaluate_unit, unit): j for j, unit in enumerate(units)}
+                outcomes = [(futures[future], future.result()) for future in as_completed(futures)]
+        for j, outcome in outcomes:
+            name, i, key = keys[j]
+            results[key] = dict(outcome, series=name, params=params[name][i],
+                                cutoff=str(units[j][2].date()), horizon=horizon)
+            scores[name][i].append(outcome['mae'])
+        save_results(results, results_path)
+        print(f"Tuning cutoff {rung + 1}/{n_cutoffs}: {len(units)} fitted, {reused} reused "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        # Early stopping: only the best candidates go on to the next (older) cutoff
+        for name in alive:
+            ranked = sorted(alive[name], key=lambda i: np.mean(scores[name][i]))
+            alive[name] = ranked[:max(1, math.ceil(len(ranked) * keep))]
+
+    best = {}
+    for task in tasks:
+        name = task['name']
+        i = min(alive[name], key=lambda i: np.mean(scores[name][i]))
+        best[name] = {
+            'params': params[name][i],
+            'mae': round(float(np.mean(scores[name][i])), 2),
+            'cutoffs': len(scores[name][i]),
+            'candidates': len(candidates)
+        }
+    return best
+
+def save_best_params(best, path=BEST_PARAMS_FILE):
+    """Merge tuned settings into the config read by normal runs"""
+    if not best:
+        print("No series tuned; best parameters left unchanged")
+        return
+    config = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            config = json.load(f)
+    config.update(best)
+    with open(path, 'w') as f:
+        json.dump(config, f, indent=2)
+    for name, entry in best.items():
+        settings = ', '.join(f"{key}={value}" for key, value in sorted(entry['params'].items())
+                             if key in DEFAULT_GRID)
+        print(f"  {name}: {settings} (backtest MAE {entry['mae']:,.2f})")
+    print(f"Best parameters saved to '{path}'")
+
+def load_best_params(path=BEST_PARAMS_FILE):
+    """Tuned parameters per series name, empty when no tuning run has been saved"""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {name: entry['params'] for name, entry in json.load(f).items()}
+
+def tuned_params(name, default, best=None):
+    """Parameters for one series: the tuned ones when available, otherwise the defaults"""
+    best = load_best_params() if best is None else best
+    return dict(default, **best.get(name, {}))
+
+def add_tuning_arguments(parser):
+    """Add the tuning options: the per-series settings search and its successive-halving budget"""
+    parser.add_argument('--tune', action='store_true',
+                        help="Search Prophet settings per series before the run and save the best ones")
+    parser.add_argument('--tune-cutoffs', type=int, default=3,
+                        help="Backtest cutoffs a candidate can be scored on")
+    parser.add_argument('--tune-keep', type=float, default=1 / 3,
+                        help="Fraction of candidates kept after each cutoff")